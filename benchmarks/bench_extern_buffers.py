@@ -0,0 +1,62 @@
+"""Extern buffer benchmark
+
+Round trips arrays of growing size through a Python extern, with the "buffer"
+calling convention and as plain lists.
+The buffer extern returns its argument. List results are flattened to their first
+value, so the list extern copies its argument into an array to return all of it.
+The buffer round trip should stay flat as the arrays grow.
+
+Run with `python benchmarks/bench_extern_buffers.py`
+"""
+
+import tempfile
+from pathlib import Path
+from time import perf_counter
+
+from lark import Lark
+
+from mathlamp.main import CalculateTree, DebugConfig, grammar
+from mathlamp.stdlamp.arrays import LampArray
+
+EXTERN = """
+from mathlamp.stdlamp.arrays import LampArray
+
+class LampExtern:
+    def ident(self, x):
+        return x
+
+    def ident_list(self, x):
+        return LampArray.from_values(x)
+"""
+
+SIZES = [1_000, 10_000, 100_000, 1_000_000]
+CALLS = 20
+
+
+def measure(parser: Lark, calc: CalculateTree, func: str, value) -> float:
+    calc.vars["x"] = value
+    tree = parser.parse(f"{func}(x)")
+    start = perf_counter()
+    for _ in range(CALLS):
+        calc.visit(tree)
+    return (perf_counter() - start) / CALLS
+
+
+if __name__ == "__main__":
+    parser = Lark(grammar, parser="lalr")
+    with tempfile.TemporaryDirectory() as directory:
+        extern = Path(directory, "bench_extern.py")
+        extern.write_text(EXTERN)
+        buffer_calc = CalculateTree(DebugConfig())
+        buffer_calc.visit(
+            parser.parse(f'@extern("python", "{extern}", "ident", "buffer")')
+        )
+        list_calc = CalculateTree(DebugConfig())
+        list_calc.visit(parser.parse(f'@extern("python", "{extern}", "ident_list")'))
+        for size in SIZES:
+            array = LampArray.from_values(range(size))
+            buffer_time = measure(parser, buffer_calc, "ident", array)
+            list_time = measure(parser, list_calc, "ident_list", array.tolist())
+            print(
+                f"{size:>9}: buffer {buffer_time * 1e6:9.1f}us, list {list_time * 1e6:9.1f}us"
+            )
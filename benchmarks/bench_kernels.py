@@ -0,0 +1,44 @@
+"""Array kernel benchmark
+
+Calls `func f(x) { pow(x, 2) * 3 + sqrt(x) }` on arrays of growing size,
+as a NumPy kernel, as a generated Python kernel and once per element
+through the interpreter.
+
+Run with `python benchmarks/bench_kernels.py`
+"""
+
+from time import perf_counter
+
+from mathlamp.main import CalculateTree, DebugConfig, lamp_parser
+from mathlamp.stdlamp.arrays import LampArray, numpy
+from mathlamp.stdlamp.infer import specialize
+from mathlamp.stdlamp.kernels import lift
+
+FUNC = "func f(x) { pow(x, 2) * 3 + sqrt(x) }"
+
+SIZES = [1_000, 10_000, 100_000]
+CALLS = 5
+
+
+def measure(call, *args) -> float:
+    start = perf_counter()
+    for _ in range(CALLS):
+        call(*args)
+    return (perf_counter() - start) / CALLS
+
+
+if __name__ == "__main__":
+    calc = CalculateTree(DebugConfig())
+    calc.visit(specialize(lamp_parser().parse(FUNC)))
+    func = calc.funcs[0]
+    numpy_kernel = lift(func["params"], func["block"])
+    python_kernel = lift(func["params"], func["block"], use_numpy=False)
+    for size in SIZES:
+        array = LampArray.from_values(range(size))
+        numpy_time = measure(numpy_kernel, [array]) if numpy is not None else 0
+        python_time = measure(python_kernel, [array])
+        element_time = measure(calc._call_per_element, func, [array])
+        print(
+            f"{size:>7}: numpy {numpy_time * 1e3:8.2f}ms, python {python_time * 1e3:8.2f}ms, "
+            f"per element {element_time * 1e3:9.2f}ms"
+        )
@@ -0,0 +1,59 @@
+"""Struct instance benchmark
+
+Creates and updates a million struct instances, comparing the compact
+`StructType` instances with the old dict layout.
+
+Run with `python benchmarks/bench_structs.py [count]`
+"""
+
+import sys
+import tracemalloc
+from time import perf_counter
+
+from mathlamp.stdlamp.structs import StructType
+
+
+def legacy(count: int) -> list:
+    struct = {"name": "Point", "members": ["x", "y"], "namespace": "bench"}
+    instances = []
+    for i in range(count):
+        instance = struct | {"values": {}}
+        for member in struct["members"]:
+            instance[member] = None
+        if "x" in instance["members"]:
+            instance["values"]["x"] = i
+        if "y" in instance["members"]:
+            instance["values"]["y"] = i * 2
+        instances.append(instance)
+    return instances
+
+
+def compact(count: int) -> list:
+    struct = StructType("Point", ["x", "y"], "bench")
+    instances = []
+    for i in range(count):
+        instance = struct.new()
+        if "x" in struct.offsets:
+            instance.x = i
+        if "y" in struct.offsets:
+            instance.y = i * 2
+        instances.append(instance)
+    return instances
+
+
+def measure(name: str, func, count: int):
+    tracemalloc.start()
+    start = perf_counter()
+    instances = func(count)
+    elapsed = perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"{name:>8}: {elapsed:.3f}s, {size / count:.0f} bytes per instance ({len(instances)} instances)"
+    )
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    measure("legacy", legacy, count)
+    measure("compact", compact, count)
@@ -2,9 +2,9 @@
 # Check it here -> https://github.com/lark-parser/lark/blob/08c91939876bd3b2e525441534df47e0fb25a4d1/examples/calc.py
 import typer
 from typing import Annotated
-from typing import Optional
+from typing import Awaitable, Optional
 
-from lark import Lark
+from lark import Lark, Tree
 from lark.visitors import Interpreter
 
 from rich.console import Console
@@ -12,20 +12,83 @@ from rich.console import Console
 console = Console()
 
 import sys
+import asyncio
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache, partial
+from itertools import repeat
+from hashlib import sha256
 from os import getcwd
 
 from importlib import resources as impresources
 import importlib.util
 
-from mathlamp import stdlamp
+from mathlamp import __version__, stdlamp
 from mathlamp.stdlamp.errors import *
+from mathlamp.stdlamp import data
+
+# Registers the reductions as native built-ins
+from mathlamp.stdlamp import reductions
+from mathlamp.stdlamp.arrays import LampArray, numpy
+from mathlamp.stdlamp.bundle import (
+    BUNDLE_SUFFIX,
+    LampBundle,
+    find_bundle,
+    source_hash,
+    write_bundle,
+)
+from mathlamp.stdlamp.incremental import IncrementalSession
+from mathlamp.stdlamp.infer import specialize
+from mathlamp.stdlamp.kernels import lift, to_array
+from mathlamp.stdlamp.memory import MemoryTracker, checkpoint
+from mathlamp.stdlamp.natives import GLOBAL, NATIVES, find_native
+from mathlamp.stdlamp.stream import func_signature, iter_chunks, iter_statements
+from mathlamp.stdlamp.output import LampOutput, OutputFormat, TextOutput, open_output
+from mathlamp.stdlamp.snapshot import LampSnapshot, write_snapshot
+from mathlamp.stdlamp.structs import StructColumns, StructInstance, StructType
 
 grammar_file = impresources.files(stdlamp) / "grammar.lark"
 with grammar_file.open("r") as f:
     global grammar
     grammar = f.read()
 
+GRAMMAR_HASH = sha256(grammar.encode("utf-8")).hexdigest()
+# Precompiled bundles only work with the interpreter and grammar that built them
+BUNDLE_TAG = {"interpreter": __version__, "grammar": GRAMMAR_HASH}
+# Snapshots hold compiled trees too, so they are checked the same way
+SNAPSHOT_TAG = BUNDLE_TAG
+
+# Built-ins without a namespace that run on the interpreter, as `_builtin_<name>()`.
+# They are found after the functions of the file, so their names stay usable
+# for functions and variables (Ex. `func load(x)`)
+BUILTINS = {
+    name: {
+        "name": name,
+        "params": params,
+        "namespace": GLOBAL,
+        "module": "builtin",
+        "lang": "builtin",
+    }
+    for name, params in (
+        ("load", None),
+        ("save", ["path", "values"]),
+        ("columns", ["struct"]),
+        ("append", None),
+        ("filter", ["values", "condition"]),
+        ("gather", None),
+    )
+}
+# gather() gets its calls unevaluated, to run them concurrently
+BUILTINS["gather"]["raw_args"] = True
+
 app = typer.Typer(pretty_exceptions_enable=False)
+tools = typer.Typer(pretty_exceptions_enable=False)
+
+
+@cache
+def lamp_parser() -> Lark:
+    """Returns the shared LALR parser of the MathLamp grammar"""
+    return Lark(grammar, parser="lalr")
 
 
 def flatten(nested_list: list) -> list:
@@ -52,20 +115,68 @@ class DebugConfig:
         debug_var: bool = False,
         debug_func: bool = False,
         debug_struct: bool = False,
+        debug_mem: bool = False,
     ):
         self.debug_var = debug_var
         self.debug_func = debug_func
         self.debug_struct = debug_struct
+        self.debug_mem = debug_mem
 
 
 class CalculateTree(Interpreter):
-    def __init__(self, debug: DebugConfig, file: str = "REPL"):
+    def __init__(
+        self,
+        debug: DebugConfig,
+        file: str = "REPL",
+        output: Optional[LampOutput] = None,
+        extern_threads: Optional[int] = None,
+        lazy: bool = False,
+        memory: Optional[MemoryTracker] = None,
+    ):
         super().__init__()
         self.file = file
         self.vars = {}
         self.funcs = []
         self.structs = []
         self.debug = debug
+        if output is None:
+            output = TextOutput(sys.stdout, buffer_size=0)
+        self.output = output
+        self.externs = {}
+        self.extern_threads = extern_threads
+        self._loop = None
+        self.lazy = lazy
+        # Modules imported in lazy mode that were not used yet
+        self.pending_modules = {}
+        # Array kernels of function bodies, by the id of the body
+        self.kernels = {}
+        self.memory = memory
+        if memory is not None:
+            # Only tracked interpreters pay for the line bookkeeping
+            self._visit_tree = self._visit_tree_tracked
+
+    def _visit_tree_tracked(self, tree):
+        """Visits a node, attributing the memory it allocates to its source line
+
+        Needs a parser with `propagate_positions=True`
+        """
+        line = getattr(tree.meta, "line", None)
+        switch = line is not None and line != self.memory.line
+        if switch:
+            previous = self.memory.enter(line)
+        assignment = tree.data in ("assign_var", "assign_struct")
+        if assignment:
+            before = tracemalloc.get_traced_memory()[0]
+        try:
+            return Interpreter._visit_tree(self, tree)
+        finally:
+            if assignment:
+                self.memory.assigned(
+                    tree.children[0].value,
+                    tracemalloc.get_traced_memory()[0] - before,
+                )
+            if switch:
+                self.memory.enter(previous)
 
     def start(self, tree):
         self.visit_children(tree)
@@ -78,14 +189,18 @@ class CalculateTree(Interpreter):
         if self.file == "REPL":
             return self.visit_children(tree)[0]
         else:
-            print(self.visit_children(tree)[0])
+            self.output.write(self.visit_children(tree)[0])
 
     def pow(self, tree):
         """pow() function
 
-        Ex. `pow(2,2) // 4`
+        The third argument is a modulus
+
+        Ex. `pow(2,2) // 4`, `pow(3, 200, 7) // 2`
         """
         data = self.visit_children(tree)
+        if len(data) == 3:
+            return pow(*data)
         return data[0] ** data[1]
 
     def sqrt(self, tree):
@@ -102,6 +217,53 @@ class CalculateTree(Interpreter):
         else:
             return val
 
+    def sqrt_int(self, tree):
+        """sqrt() of an int
+
+        Perfect squares are found with an exact integer square root
+        """
+        from math import isqrt, sqrt
+
+        data = self.visit_children(tree)
+        root = isqrt(data[0])
+        if root * root == data[0]:
+            return root
+        return sqrt(data[0])
+
+    def _builtin_load(self, *args):
+        """load() function
+
+        Loads `.npy`, `.csv` or raw binary files as a numeric array
+
+        Ex. `prices = load("prices.csv", "close")`
+        """
+        from pathlib import Path
+
+        if not 1 <= len(args) <= 2:
+            raise ArgumentError(len(args), 2, "load", self.file)
+        if not isinstance(args[0], str):
+            raise InvalidData("The path must be a string", self.file)
+        try:
+            return data.load(Path(getcwd(), args[0]), *args[1:])
+        except FileNotFoundError:
+            raise MissingFile(args[0])
+        except ValueError as e:
+            raise InvalidData(str(e), self.file)
+
+    def _builtin_save(self, *args):
+        """save() function
+
+        Ex. `save("result.npy", values)`
+        """
+        from pathlib import Path
+
+        if not isinstance(args[0], str):
+            raise InvalidData("The path must be a string", self.file)
+        try:
+            data.save(Path(getcwd(), args[0]), args[1])
+        except ValueError as e:
+            raise InvalidData(str(e), self.file)
+
     def var(self, tree):
         """Variable reference
 
@@ -121,11 +283,8 @@ class CalculateTree(Interpreter):
         """
         name = tree.children[0].value
         val = self.visit_children(tree)[1]
-        if isinstance(val, dict) and "members" in val:
-            tempStruct = val | {"values": {}}
-            for member in val["members"]:
-                tempStruct[member] = None
-            val = tempStruct
+        if isinstance(val, StructType):
+            val = val.new()
         self.vars[name] = val
 
     def add(self, tree):
@@ -159,11 +318,22 @@ class CalculateTree(Interpreter):
         """
         data = self.visit_children(tree)
         val = data[0] / data[1]
-        if val.is_integer():
+        if isinstance(val, float) and val.is_integer():
             return int(val)
         else:
             return val
 
+    def div_int(self, tree):
+        """Division of two ints
+
+        Checks for an exact quotient without going through a float
+        """
+        data = self.visit_children(tree)
+        quotient, remainder = divmod(data[0], data[1])
+        if remainder == 0:
+            return quotient
+        return data[0] / data[1]
+
     def mod(self, tree):
         """Modulus operation
 
@@ -185,6 +355,14 @@ class CalculateTree(Interpreter):
         else:
             return int(val)
 
+    def number_int(self, tree):
+        """Number type, known to be an int"""
+        return int(tree.children[0].value)
+
+    def number_float(self, tree):
+        """Number type, known to be a float"""
+        return float(tree.children[0].value)
+
     def str(self, tree):
         """String type
 
@@ -278,7 +456,7 @@ class CalculateTree(Interpreter):
         data = self.visit(tree.children[0])
         if data:
             out = self.visit(tree.children[1])
-            if not out == None:
+            if out is not None:
                 return out
 
     def eq(self, tree):
@@ -351,11 +529,22 @@ class CalculateTree(Interpreter):
         data = self.visit(tree.children[0])
         for _ in range(data):
             out = self.visit(tree.children[1])
-            if type(out).__name__ == "list":
-                for i in flatten(out):
-                    print(i)
-            elif not out == None:
-                print(out)
+            if isinstance(out, list):
+                self.output.write_all(flatten(out))
+            elif out is not None:
+                self.output.write(out)
+
+    def repeat_block_list(self, tree):
+        """Repeat block whose block always returns a list"""
+        data = self.visit(tree.children[0])
+        for _ in range(data):
+            self.output.write_all(flatten(self.visit(tree.children[1])))
+
+    def repeat_block_value(self, tree):
+        """Repeat block whose block always returns a single value"""
+        data = self.visit(tree.children[0])
+        for _ in range(data):
+            self.output.write(self.visit(tree.children[1]))
 
     def for_block(self, tree):
         """Iterate over a list
@@ -368,15 +557,36 @@ class CalculateTree(Interpreter):
         """
         name = tree.children[0].children[0].value
         num = self.visit(tree.children[1])
+        if not self.file == "REPL":
+            for i in num:
+                self.vars[name] = i
+                self.visit(tree.children[2])
+            return
         for i in num:
             self.vars[name] = i
             out = self.visit(tree.children[2])
-            if self.file == "REPL":
-                if type(out).__name__ == "list":
-                    for i in flatten(out):
-                        print(i)
-                elif not out == None:
-                    print(out)
+            if isinstance(out, list):
+                self.output.write_all(flatten(out))
+            elif out is not None:
+                self.output.write(out)
+
+    def for_block_list(self, tree):
+        """For block whose block always returns a list"""
+        if not self.file == "REPL":
+            return self.for_block(tree)
+        name = tree.children[0].children[0].value
+        for i in self.visit(tree.children[1]):
+            self.vars[name] = i
+            self.output.write_all(flatten(self.visit(tree.children[2])))
+
+    def for_block_value(self, tree):
+        """For block whose block always returns a single value"""
+        if not self.file == "REPL":
+            return self.for_block(tree)
+        name = tree.children[0].children[0].value
+        for i in self.visit(tree.children[1]):
+            self.vars[name] = i
+            self.output.write(self.visit(tree.children[2]))
 
     def func_block(self, tree):
         """Function definition
@@ -402,97 +612,452 @@ class CalculateTree(Interpreter):
         }
         self.funcs.append(func)
 
-    def default_func(self, tree):
-        """Function call
-
-        Ex. `hello()`
-        """
-        from pathlib import Path
-
-        name = tree.children[0].value
-        try:
-            args = self.visit(tree.children[1])
-        except IndexError:
-            args = []
+    def _find_func(self, name: str, namespace: str, display_name: str) -> dict:
+        if namespace in NATIVES:
+            func = find_native(namespace, name)
+            if func is not None:
+                return func
         func = next(
             filter(
-                lambda x: x["name"] == name and x["namespace"] == self.file, self.funcs
+                lambda x: x["name"] == name and x["namespace"] == namespace, self.funcs
             ),
             None,
         )
+        if func is None and namespace in self.pending_modules:
+            self._materialize(namespace)
+            return self._find_func(name, namespace, display_name)
+        if func is None and namespace == self.file:
+            # Functions of the file shadow the built-ins without a namespace
+            func = BUILTINS.get(name) or find_native(GLOBAL, name)
         if func is None:
-            raise InvalidFunction(name, self.file)
-        if not len(args) == len(func["params"]):
+            raise InvalidFunction(display_name, self.file)
+        return func
+
+    def _lazy_module(self, text: str, namespace: str) -> list:
+        """Loads a module in lazy mode
+
+        Function definitions only record their signature and keep their body as
+        source, every other statement runs right away
+
+        Args:
+                text (str): The module's source
+                namespace (str): The module's namespace
+
+        Returns:
+                list: The module's functions
+        """
+        import_parser = CalculateTree(
+            self.debug, namespace, self.output, self.extern_threads, lazy=True
+        )
+        pending = []
+
+        def run_pending():
+            if pending:
+                import_parser.visit(specialize(lamp_parser().parse("".join(pending))))
+                pending.clear()
+
+        for _, chunk in iter_chunks(text.splitlines(keepends=True)):
+            signature = func_signature(chunk)
+            if signature is None:
+                pending.append(chunk)
+                continue
+            run_pending()
+            import_parser.funcs.append(
+                {
+                    "name": signature[0],
+                    "params": signature[1],
+                    "block": None,
+                    "source": chunk,
+                    "namespace": namespace,
+                    "module": namespace,
+                    "lang": "lamp",
+                }
+            )
+        run_pending()
+        self.pending_modules.update(import_parser.pending_modules)
+        return import_parser.funcs
+
+    def _resolve_package(self, module_file):
+        """Picks the bundle of a package over its source
+
+        Bundles that are corrupt, built by another version, or built from a source
+        that has changed since (its hash doesn't match the source next to them)
+        are skipped
+        """
+        bundle_file = find_bundle(module_file)
+        if bundle_file is None:
+            return module_file
+        try:
+            bundle = LampBundle(bundle_file)
+        except ValueError as e:
+            if not module_file.exists():
+                raise InvalidBundle(bundle_file.name, str(e), self.file)
+            return module_file
+        if bundle.matches(BUNDLE_TAG):
+            if not module_file.exists():
+                return bundle_file
+            if bundle.toc["hash"] == source_hash(module_file.read_text()):
+                return bundle_file
+        elif not module_file.exists():
+            raise InvalidBundle(
+                bundle_file.name,
+                "it was built for another MathLamp version or grammar",
+                self.file,
+            )
+        return module_file
+
+    def _bundle_funcs(self, bundle_file, namespace: str) -> list:
+        """Loads the functions of a package bundle
+
+        In lazy mode function bodies are unpickled on their first call
+        """
+        bundle = LampBundle(bundle_file)
+        import_parser = CalculateTree(
+            self.debug, namespace, self.output, self.extern_threads, lazy=self.lazy
+        )
+        for name, params in bundle.symbols.items():
+            func = {
+                "name": name,
+                "params": params,
+                "block": None,
+                "namespace": namespace,
+                "module": namespace,
+                "lang": "lamp",
+            }
+            if self.lazy:
+                func["bundle"] = bundle
+            else:
+                func["block"] = bundle.load_symbol(name)
+            import_parser.funcs.append(func)
+        import_parser.visit(bundle.load_module())
+        self.pending_modules.update(import_parser.pending_modules)
+        return import_parser.funcs
+
+    def _materialize(self, namespace: str):
+        """Loads a module imported in lazy mode, on the first use of its namespace"""
+        module_file = self.pending_modules.pop(namespace)
+        if module_file.suffix == BUNDLE_SUFFIX:
+            self.funcs = self.funcs + self._bundle_funcs(module_file, namespace)
+            return
+        with module_file.open("r") as f:
+            funcs = self._lazy_module(f.read(), namespace)
+        for func in funcs:
+            func["module"] = namespace
+        self.funcs = self.funcs + funcs
+
+    def _compile_func(self, func: dict):
+        """Parses the body of a function loaded in lazy mode, on its first call"""
+        if "bundle" in func:
+            func["block"] = func.pop("bundle").load_symbol(func["name"])
+            return
+        tree = specialize(lamp_parser().parse(func.pop("source")))
+        if isinstance(tree.children[1], Tree) and tree.children[1].data == "params":
+            func["block"] = tree.children[2]
+        else:
+            func["block"] = tree.children[1]
+
+    def _resolve_call(self, tree) -> tuple:
+        """Finds the function and evaluates the arguments of a call
+
+        Args:
+                tree: A `default_func` or `namespace_func` node
+
+        Returns:
+                tuple: The function and the list of arguments
+        """
+        if tree.data == "namespace_func":
+            namespace = tree.children[0].value
+            name = tree.children[1].value
+            func = self._find_func(name, namespace, namespace + "." + name)
+            args_index = 2
+        else:
+            name = tree.children[0].value
+            func = self._find_func(name, self.file, name)
+            args_index = 1
+        try:
+            if func.get("raw_args"):
+                args = tree.children[args_index].children
+            else:
+                args = self.visit(tree.children[args_index])
+        except IndexError:
+            args = []
+        if func["params"] is not None and not len(args) == len(func["params"]):
             raise ArgumentError(len(args), len(func["params"]), func["name"], self.file)
-        if not len(args) == 0 and func["lang"] == "lamp":
-            for i, arg in enumerate(args):
-                self.vars[func["params"][i]] = arg
-        if func["lang"] == "lamp":
-            result = self.visit(func["block"])
-        elif func["lang"] == "python":
+        return func, args
+
+    def _extern(self, func: dict):
+        """Returns the Python callable of an extern function
+
+        Extern modules are loaded once per interpreter
+        """
+        from pathlib import Path
+
+        key = (func["module"], func["name"])
+        if key not in self.externs:
             spec = importlib.util.spec_from_file_location(
                 str(Path(func["module"]).stem), func["module"]
             )
             extern = importlib.util.module_from_spec(spec)
             sys.modules[str(Path(func["module"]).stem)] = extern
             spec.loader.exec_module(extern)
-            func_python = getattr(extern.LampExtern(), func["name"])
-            result = func_python(*args)
-        if type(result).__name__ == "list":
-            for i in flatten(result):
-                return i
-        elif not result == None:
-            return result
-        if not len(args) == 0 and func["lang"] == "lamp":
-            for i, arg in enumerate(args):
-                self.vars.pop(func["params"][i])
+            self.externs[key] = getattr(extern.LampExtern(), func["name"])
+        return self.externs[key]
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """The event loop that runs async and threaded extern functions"""
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+            self._loop.set_default_executor(
+                ThreadPoolExecutor(
+                    self.extern_threads, thread_name_prefix="lamp-extern"
+                )
+            )
+        return self._loop
 
-    def namespace_func(self, tree):
-        """Namespaced function call
+    def _extern_args(self, func: dict, args: list) -> list:
+        """Converts arrays to the calling convention of an extern
 
-        Ex. `mylib:hello()`
+        "buffer" externs get a `memoryview` and "numpy" externs get a NumPy view
+        of each array, both without copying the values
         """
-        from pathlib import Path
-
-        name = tree.children[1].value
-        namespace = tree.children[0].value
-        try:
-            args = self.visit(tree.children[2])
-        except IndexError:
-            args = []
-        func = next(
-            filter(
-                lambda x: x["name"] == name and x["namespace"] == namespace, self.funcs
-            ),
-            None,
-        )
-        if func is None:
-            raise InvalidFunction(namespace + "." + name, self.file)
-        if not len(args) == len(func["params"]):
-            raise ArgumentError(len(args), len(func["params"]), func["name"], self.file)
+        match func.get("convention"):
+            case "buffer":
+                return [
+                    memoryview(arg.data) if isinstance(arg, LampArray) else arg
+                    for arg in args
+                ]
+            case "numpy" if numpy is not None:
+                return [
+                    arg.to_numpy() if isinstance(arg, LampArray) else arg
+                    for arg in args
+                ]
+            case "numpy":
+                return self._extern_args(func | {"convention": "buffer"}, args)
+        return args
+
+    def _extern_awaitable(self, func: dict, args: list) -> Optional[Awaitable]:
+        """Returns an awaitable for an async or threaded extern, None for other functions"""
+        if func["lang"] != "python":
+            return None
+        args = self._extern_args(func, args)
+        if func.get("async"):
+            return self._extern(func)(*args)
+        if func.get("thread"):
+            return self.loop.run_in_executor(None, partial(self._extern(func), *args))
+        return None
+
+    def _call_func(self, func: dict, args: list):
+        if func["lang"] == "native":
+            return self._call_native(func, args)
+        if func["lang"] == "builtin":
+            return getattr(self, "_builtin_" + func["name"])(*args)
+        if func["lang"] == "lamp" and any(isinstance(arg, LampArray) for arg in args):
+            result = self._call_kernel(func, args)
+            if result is not None:
+                return result
         if not len(args) == 0 and func["lang"] == "lamp":
             for i, arg in enumerate(args):
                 self.vars[func["params"][i]] = arg
         if func["lang"] == "lamp":
+            if func["block"] is None:
+                self._compile_func(func)
             result = self.visit(func["block"])
         elif func["lang"] == "python":
-            spec = importlib.util.spec_from_file_location(
-                str(Path(func["module"]).stem), func["module"]
+            awaitable = self._extern_awaitable(func, args)
+            if awaitable is None:
+                result = self._extern(func)(*self._extern_args(func, args))
+            else:
+                result = self.loop.run_until_complete(awaitable)
+        return self._func_result(func, args, result)
+
+    def _kernel(self, func: dict):
+        """Returns the array kernel of a function, None if its body can't be lifted"""
+        if func["block"] is None:
+            self._compile_func(func)
+        block = func["block"]
+        entry = self.kernels.get(id(block))
+        # The body is kept with its kernel, so its id isn't reused
+        if entry is None or entry[0] is not block:
+            entry = (block, lift(func["params"], block))
+            self.kernels[id(block)] = entry
+        return entry[1]
+
+    def _call_kernel(self, func: dict, args: list) -> Optional[LampArray]:
+        """Calls a function once over whole arrays
+
+        Functions that are only arithmetic and math built-ins on their params run
+        as an array kernel. If the kernel fails, the function is called on each element
+        so errors are the same as with single values.
+        Other functions return None and get the arrays as they are.
+        """
+        kernel = self._kernel(func)
+        if kernel is None:
+            return None
+        try:
+            return kernel(args)
+        except (TypeError, ValueError, ArithmeticError):
+            return self._call_per_element(func, args)
+
+    def _call_per_element(self, func: dict, args: list) -> LampArray:
+        lengths = {len(arg) for arg in args if isinstance(arg, LampArray)}
+        if len(lengths) > 1:
+            raise InvalidData(
+                f"Can't combine arrays of {sorted(lengths)} values", self.file
             )
-            extern = importlib.util.module_from_spec(spec)
-            sys.modules[str(Path(func["module"]).stem)] = extern
-            spec.loader.exec_module(extern)
-            func_python = getattr(extern.LampExtern(), func["name"])
-            result = func_python(*args)
-        if type(result).__name__ == "list":
+        columns = [arg if isinstance(arg, LampArray) else repeat(arg) for arg in args]
+        return to_array(
+            [self._call_func(func, list(values)) for values in zip(*columns)]
+        )
+
+    def _call_native(self, func: dict, args: list):
+        try:
+            result = func["call"](*args)
+        except (TypeError, ValueError, OverflowError) as e:
+            name = func["name"]
+            if func["namespace"] != GLOBAL:
+                name = f"{func['namespace']}:{name}"
+            raise NativeError(name, str(e), self.file)
+        if isinstance(result, float) and result.is_integer():
+            return int(result)
+        return result
+
+    def _func_result(self, func: dict, args: list, result):
+        if func.get("convention") and not isinstance(result, (LampArray, list)):
+            try:
+                view = memoryview(result)
+            except TypeError:
+                pass
+            else:
+                # Buffer results are wrapped as they are instead of being flattened
+                if view.ndim == 0:
+                    return view.tolist()
+                try:
+                    if not view.c_contiguous:
+                        # Strided results (Ex. a transposed array) are packed once
+                        view = memoryview(view.tobytes()).cast(view.format)
+                    elif view.ndim != 1:
+                        view = view.cast("B").cast(view.format)
+                except (TypeError, ValueError) as e:
+                    raise InvalidData(str(e), self.file)
+                return LampArray(view)
+        if isinstance(result, list):
             for i in flatten(result):
                 return i
-        elif not result == None:
+        elif result is not None:
             return result
         if not len(args) == 0 and func["lang"] == "lamp":
             for i, arg in enumerate(args):
                 self.vars.pop(func["params"][i])
 
+    def default_func(self, tree):
+        """Function call
+
+        Ex. `hello()`
+        """
+        func, args = self._resolve_call(tree)
+        return self._call_func(func, args)
+
+    def namespace_func(self, tree):
+        """Namespaced function call
+
+        Ex. `mylib:hello()`
+        """
+        func, args = self._resolve_call(tree)
+        return self._call_func(func, args)
+
+    def _builtin_gather(self, *args):
+        """gather() function
+
+        Runs async and threaded extern calls concurrently,
+        returns the list of results
+
+        Ex. `gather(fetch("a"), fetch("b"))`
+        """
+        calls = []
+        for child in args:
+            if isinstance(child, Tree) and child.data in (
+                "default_func",
+                "namespace_func",
+            ):
+                func, args = self._resolve_call(child)
+                awaitable = self._extern_awaitable(func, args)
+                if awaitable is not None:
+                    calls.append((func, args, awaitable))
+                    continue
+                calls.append((None, None, self._call_func(func, args)))
+            else:
+                calls.append((None, None, self.visit(child)))
+
+        async def wait():
+            return await asyncio.gather(
+                *(awaitable for func, _, awaitable in calls if func is not None)
+            )
+
+        results = iter(self.loop.run_until_complete(wait()))
+        return [
+            value if func is None else self._func_result(func, args, next(results))
+            for func, args, value in calls
+        ]
+
+    def close(self):
+        """Shuts down the event loop and thread pool of extern functions"""
+        if self._loop is not None:
+            self._loop.run_until_complete(self._loop.shutdown_default_executor())
+            self._loop.close()
+            self._loop = None
+
+    def save_snapshot(self, target):
+        """Saves the variables, functions, structs and pending modules into a snapshot
+
+        Args:
+                target (Path): The snapshot file to write
+        """
+        state = {
+            "file": self.file,
+            "vars": self.vars,
+            "funcs": self.funcs,
+            "structs": self.structs,
+            "pending_modules": self.pending_modules,
+        }
+        write_snapshot(state, target, SNAPSHOT_TAG)
+
+    def restore_snapshot(self, source):
+        """Replaces the state of the interpreter with a snapshot
+
+        Functions and structs of the saved session's file move to this interpreter's file,
+        so a snapshot saved in the REPL can be restored when running a file
+
+        Args:
+                source (Path): The snapshot file
+        """
+        try:
+            snapshot = LampSnapshot(source)
+        except FileNotFoundError:
+            raise MissingFile(str(source))
+        except ValueError as e:
+            raise InvalidSnapshot(source.name, str(e), self.file)
+        if not snapshot.matches(SNAPSHOT_TAG):
+            raise InvalidSnapshot(
+                source.name,
+                "it was saved by another MathLamp version or grammar",
+                self.file,
+            )
+        state = snapshot.load()
+        for func in state["funcs"]:
+            if func["namespace"] == state["file"]:
+                func["namespace"] = self.file
+            if func["module"] == state["file"]:
+                func["module"] = self.file
+        for struct in state["structs"]:
+            if struct.namespace == state["file"]:
+                struct.namespace = self.file
+        self.vars = state["vars"]
+        self.funcs = state["funcs"]
+        self.structs = state["structs"]
+        self.pending_modules = state["pending_modules"]
+        self.externs = {}
+
     def import_stmt(self, tree):
         """Import functions from source files
 
@@ -519,10 +1084,10 @@ class CalculateTree(Interpreter):
                 with open(Path(getcwd(), module_name[1:] + ".lmp"), "r") as f:
                     # TODO: Fix module imports
                     # Supposed to be called but never is
-                    import_lex = Lark(grammar, parser="lalr")
+                    import_lex = lamp_parser()
                     import_parser = CalculateTree(self.debug)
                     text = f.read()
-                    ast = import_lex.parse(text)
+                    ast = specialize(import_lex.parse(text))
                     import_parser.visit(ast)
                     gen_funcs = import_parser.funcs
                     filter_list = [
@@ -544,12 +1109,17 @@ class CalculateTree(Interpreter):
                 with module_file.open("r") as f:
                     # Called when a filtered import (has a import list)
                     # Ex: import test.lmp (test)
-                    import_lex = Lark(grammar, parser="lalr")
-                    import_parser = CalculateTree(self.debug, module_name[1:])
+                    import_lex = lamp_parser()
+                    import_parser = CalculateTree(
+                        self.debug, module_name[1:], self.output, lazy=self.lazy
+                    )
                     text = f.read()
-                    ast = import_lex.parse(text)
-                    import_parser.visit(ast)
-                    gen_funcs = import_parser.funcs
+                    if self.lazy:
+                        gen_funcs = self._lazy_module(text, module_name[1:])
+                    else:
+                        ast = specialize(import_lex.parse(text))
+                        import_parser.visit(ast)
+                        gen_funcs = import_parser.funcs
                     filter_list = []
                     for func in gen_funcs:
                         if func["namespace"] == module_name[1:]:
@@ -567,27 +1137,40 @@ class CalculateTree(Interpreter):
                     module_id = module_name[1:].split(":")
                     if module_id[0] == "pkg":
                         is_pkg = True
-                        module_file = Path(
-                            getcwd(),
-                            "candlepkgs",
-                            module_name[1:].split(":")[1] + ".lmp",
+                        module_file = self._resolve_package(
+                            Path(
+                                getcwd(),
+                                "candlepkgs",
+                                module_name[1:].split(":")[1] + ".lmp",
+                            )
                         )
                     else:
                         raise InvalidPackageProvider(module_id[0], self.file)
                 elif module_name[1:].count(":") == 0:
                     module_file = Path(getcwd(), module_name[1:] + ".lmp")
+                if self.lazy:
+                    # Loaded on the first call to one of its functions
+                    namespace = module_name[1:].split(":")[-1]
+                    self.pending_modules[namespace] = module_file
+                    return
+                if module_file.suffix == BUNDLE_SUFFIX:
+                    namespace = module_name[1:].split(":")[1]
+                    self.funcs = self.funcs + self._bundle_funcs(module_file, namespace)
+                    return
                 with module_file.open("r") as f:
                     # Called when a common import (does not have a import list)
                     # Ex: import test.lmp
-                    import_lex = Lark(grammar, parser="lalr")
+                    import_lex = lamp_parser()
                     if is_pkg:
                         import_parser = CalculateTree(
-                            self.debug, module_name[1:].split(":")[1]
+                            self.debug, module_name[1:].split(":")[1], self.output
                         )
                     else:
-                        import_parser = CalculateTree(self.debug, module_name[1:])
+                        import_parser = CalculateTree(
+                            self.debug, module_name[1:], self.output
+                        )
                     text = f.read()
-                    ast = import_lex.parse(text)
+                    ast = specialize(import_lex.parse(text))
                     import_parser.visit(ast)
                     import_funcs = []
                     for func in import_parser.funcs:
@@ -604,9 +1187,19 @@ class CalculateTree(Interpreter):
 
         Ex. `@extern("python", hello.py)
         hello()`
+
+        Python externs can be `async def` methods, add "thread" after the name
+        to run a blocking method in the thread pool
+
+        Ex. `@extern("python", "fetch.py", "fetch", "thread")`
+
+        Add "buffer" or "numpy" to pass arrays as `memoryview` or NumPy views,
+        buffers returned by these externs become arrays without copying
+
+        Ex. `@extern("python", "scale.py", "scale", "numpy")`
         """
         from pathlib import Path
-        from inspect import signature
+        from inspect import iscoroutinefunction, signature
 
         keyword = tree.children[0].value
         args = self.visit(tree.children[1])
@@ -628,9 +1221,17 @@ class CalculateTree(Interpreter):
                     "namespace": self.file,
                     "module": str(Path(getcwd(), args[1])),
                     "lang": "python",
+                    "async": iscoroutinefunction(func),
+                    "thread": "thread" in args[3:],
+                    "convention": next(
+                        (flag for flag in args[3:] if flag in ("buffer", "numpy")),
+                        None,
+                    ),
                 }
+                self.externs[(func_dict["module"], func_dict["name"])] = func
                 self.funcs.append(func_dict)
         elif keyword == "debug":
+            self.output.flush()
             match args[0]:
                 case "var" if self.debug.debug_var:
                     print("debug-var>>", self.vars)
@@ -638,44 +1239,136 @@ class CalculateTree(Interpreter):
                     print("debug-func>>", self.funcs)
                 case "struct" if self.debug.debug_struct:
                     print("debug-struct>>", self.structs)
+                case "mem" if self.debug.debug_mem:
+                    print("debug-mem>>", checkpoint(self.vars, self.memory))
 
     def struct(self, tree):
         name = tree.children[0].value
         members = []
         for member in tree.children[1].children:
             members.append(member.value)
-        self.structs.append({"name": name, "members": members, "namespace": self.file})
+        self.structs.append(StructType(name, members, self.file))
 
     def struct_ref(self, tree):
         namespace = tree.children[0].value
         name = tree.children[1].value
         for struct in self.structs:
-            if struct["namespace"] == namespace and struct["name"] == name:
+            if struct.namespace == namespace and struct.name == name:
                 return struct
 
+    def _builtin_columns(self, struct):
+        """columns() function
+
+        Creates a columnar collection of struct records
+
+        Ex. `points = columns(file:Point)`
+        """
+        if not isinstance(struct, StructType):
+            raise InvalidData("Can only make columns of a struct", self.file)
+        return StructColumns(struct)
+
+    def _builtin_append(self, *args):
+        """append() function
+
+        Appends records to a columnar collection,
+        as one list per member, a dict of lists or struct instances
+
+        Ex. `append(points, [1, 2], [3, 4])`
+        """
+        if len(args) < 2:
+            raise ArgumentError(len(args), 2, "append", self.file)
+        collection, *args = args
+        if not isinstance(collection, StructColumns):
+            raise InvalidData("Can only append to struct columns", self.file)
+        members = collection.struct.members
+        if len(args) == 1 and isinstance(args[0], dict):
+            new = args[0]
+        elif all(isinstance(arg, StructInstance) for arg in args):
+            new = {member: [] for member in members}
+            for arg in args:
+                for member in members:
+                    try:
+                        new[member].append(getattr(arg, member))
+                    except AttributeError:
+                        # The member was never assigned
+                        raise InvalidData(f"{arg!r} has no {member}", self.file)
+        elif len(args) == len(members):
+            new = dict(zip(members, args))
+        else:
+            raise ArgumentError(len(args), len(members), "append", self.file)
+        try:
+            collection.extend(new)
+        except (ValueError, TypeError) as e:
+            raise InvalidData(str(e), self.file)
+
+    def _builtin_filter(self, values, condition):
+        """filter() function
+
+        Keeps the records or values where the condition is true
+
+        Ex. `big = filter(points, points.x > 10)`
+        """
+        if not isinstance(values, (LampArray, StructColumns)):
+            raise InvalidData("Can only filter arrays and struct columns", self.file)
+        if not isinstance(condition, LampArray):
+            raise InvalidData("The condition must be an array", self.file)
+        try:
+            return values.filter(condition)
+        except ValueError as e:
+            raise InvalidData(str(e), self.file)
+
+    def _struct_instance(self, var: str) -> StructInstance:
+        try:
+            return self.vars[var]
+        except KeyError:
+            raise InvalidVariable(var, self.file)
+
     def struct_val(self, tree):
         var = tree.children[0].value
         value = tree.children[1].value
-        try:
-            return self.vars[var]["values"][value]
-        except KeyError:
-            raise InvalidProperty(
-                value,
-                f"{self.vars[var]["namespace"]}:{self.vars[var]["name"]}",
-                self.file,
-            )
+        instance = self._struct_instance(var)
+        if isinstance(instance, StructColumns):
+            try:
+                return instance.column(value)
+            except KeyError:
+                raise InvalidProperty(value, instance.struct.full_name, self.file)
+        struct = instance.__struct__
+        if value in struct.offsets:
+            try:
+                return getattr(instance, value)
+            except AttributeError:
+                # The member was never assigned
+                pass
+        raise InvalidProperty(value, struct.full_name, self.file)
+
+    def struct_val_instance(self, tree):
+        """Struct member of a variable known to hold a struct instance"""
+        instance = self._struct_instance(tree.children[0].value)
+        value = tree.children[1].value
+        if value in instance.__struct__.offsets:
+            try:
+                return getattr(instance, value)
+            except AttributeError:
+                pass
+        raise InvalidProperty(value, instance.__struct__.full_name, self.file)
 
     def assign_struct(self, tree):
         var = tree.children[0].value
         val = tree.children[1].value
         output = self.visit(tree.children[2])
-        struct = self.vars[var]
-        if val not in struct["members"]:
-            raise InvalidProperty(
-                val, f"{struct["namespace"]}:{struct["name"]}", self.file
-            )
-        struct["values"][val] = output
-        self.vars[var] = struct
+        instance = self._struct_instance(var)
+        if isinstance(instance, StructColumns):
+            if val not in instance.struct.offsets:
+                raise InvalidProperty(val, instance.struct.full_name, self.file)
+            try:
+                instance.set_column(val, output)
+            except (ValueError, TypeError) as e:
+                raise InvalidData(str(e), self.file)
+            return
+        struct = instance.__struct__
+        if val not in struct.offsets:
+            raise InvalidProperty(val, struct.full_name, self.file)
+        setattr(instance, val, output)
 
 
 # Command definition
@@ -702,52 +1395,291 @@ def main(
     debug_struct: Annotated[
         bool, typer.Option("--debug-struct", help='Enable @debug("struct") statements')
     ] = False,
+    debug_mem: Annotated[
+        bool, typer.Option("--debug-mem", help='Enable @debug("mem") statements')
+    ] = False,
     debug_source: Annotated[
         bool, typer.Option("--debug-source", help="Prints source code on start")
     ] = False,
+    mem_report: Annotated[
+        bool,
+        typer.Option(
+            "--mem-report",
+            help='Trace memory by source line and variable, enables @debug("mem"). Ignores --stream',
+        ),
+    ] = False,
+    output_file: Annotated[
+        Optional[str],
+        typer.Option("--output", "-o", help="Write program output to a file"),
+    ] = None,
+    output_format: Annotated[
+        OutputFormat,
+        typer.Option("--output-format", help="Format of the program output"),
+    ] = OutputFormat.text,
+    stream: Annotated[
+        bool,
+        typer.Option(
+            "--stream",
+            help="Parse and run one statement at a time, for very large files",
+        ),
+    ] = False,
+    lazy: Annotated[
+        bool,
+        typer.Option(
+            "--lazy",
+            help="Load imported modules on first use and parse function bodies on first call",
+        ),
+    ] = False,
+    extern_threads: Annotated[
+        Optional[int],
+        typer.Option(
+            "--extern-threads", help='Size of the thread pool for "thread" externs'
+        ),
+    ] = None,
+    restore: Annotated[
+        Optional[str],
+        typer.Option(
+            "--restore", help="Start from a session snapshot saved with :save"
+        ),
+    ] = None,
 ):
     from pathlib import Path
 
-    debug = DebugConfig(debug_var, debug_func, debug_struct)
+    debug = DebugConfig(debug_var, debug_func, debug_struct, debug_mem or mem_report)
 
     if error_hook:
         sys.excepthook = sys.__excepthook__
     else:
         sys.excepthook = lamp_error_hook
-    calc_parser = Lark(grammar, parser="lalr")
-    if repl:
-        tree = calc_parser.parse(repl)
-        print(CalculateTree(debug).visit(tree))
-        exit(0)
-    if file == "REPL":
-        console.print(
-            "[yellow]The MathLamp REPL[/yellow]\nVersion [bold cyan]1.2.0-dev[/bold cyan] [bold red]=DEV TESTING="
-        )
-        calc = CalculateTree(debug)
-        while True:
+    memory = None
+    if mem_report:
+        # Source lines of the nodes are needed to attribute the memory
+        calc_parser = Lark(grammar, parser="lalr", propagate_positions=True)
+        memory = MemoryTracker()
+        memory.start()
+    else:
+        calc_parser = Lark(grammar, parser="lalr")
+    output = open_output(output_file, output_format)
+    calc = None
+    try:
+        if repl:
+            tree = specialize(calc_parser.parse(repl))
+            calc = CalculateTree(
+                debug,
+                output=output,
+                extern_threads=extern_threads,
+                lazy=lazy,
+                memory=memory,
+            )
+            if restore is not None:
+                calc.restore_snapshot(Path(getcwd(), restore))
+            output.write(calc.visit(tree))
+            exit(0)
+        if file == "REPL":
+            console.print(
+                f"[yellow]The MathLamp REPL[/yellow]\nVersion [bold cyan]{__version__}[/bold cyan] [bold red]=DEV TESTING="
+            )
+            calc = CalculateTree(
+                debug,
+                output=output,
+                extern_threads=extern_threads,
+                lazy=lazy,
+                memory=memory,
+            )
+            if restore is not None:
+                calc.restore_snapshot(Path(getcwd(), restore))
+            session = None
+            reload_file = None
+            # Functions and structs of the reloaded file, shared with the REPL
+            reloaded = []
+            while True:
+                try:
+                    s = input("> ")
+                except EOFError:
+                    break
+                if s.startswith(":reload"):
+                    # Re-runs a file in the REPL, only evaluating what changed
+                    reload_file = s[len(":reload") :].strip() or reload_file
+                    if reload_file is None:
+                        console.print("[bold red]Usage: :reload file.lmp")
+                        continue
+                    namespace = Path(reload_file).stem
+                    if session is None or session.calc.file != namespace:
+                        # The file runs in its own namespace (Ex. `model:Point`),
+                        # with the variables of the REPL
+                        file_calc = CalculateTree(
+                            debug, namespace, output, extern_threads, lazy
+                        )
+                        file_calc.vars = calc.vars
+                        session = IncrementalSession(file_calc, calc_parser, specialize)
+                    with open(Path(getcwd(), reload_file), "r", encoding="utf-8") as f:
+                        values = session.run(f.read())
+                    previous = {id(item) for item in reloaded}
+                    reloaded = session.calc.funcs + session.calc.structs
+                    calc.funcs = [
+                        func for func in calc.funcs if id(func) not in previous
+                    ] + session.calc.funcs
+                    calc.structs = [
+                        struct for struct in calc.structs if id(struct) not in previous
+                    ] + session.calc.structs
+                    output.write_all(val for val in values if val is not None)
+                    output.flush()
+                    continue
+                if s.startswith((":save", ":load")):
+                    snapshot_file = s[len(":save") :].strip()
+                    if not snapshot_file:
+                        console.print(f"[bold red]Usage: {s.strip()} session.lamps")
+                        continue
+                    if s.startswith(":save"):
+                        calc.save_snapshot(Path(getcwd(), snapshot_file))
+                    else:
+                        calc.restore_snapshot(Path(getcwd(), snapshot_file))
+                        # The old statements don't match the restored state anymore
+                        session = None
+                    continue
+                tree = specialize(calc_parser.parse(s))
+                val = calc.visit(tree)
+                if val is not None:
+                    output.write(val)
+                output.flush()
+        else:
             try:
-                s = input("> ")
-            except EOFError:
-                break
-            tree = calc_parser.parse(s)
-            val = calc.visit(tree)
-            if not val == None:
-                print(val)
+                with open(str(Path(getcwd(), file)), "r", encoding="utf-8") as f:
+                    calc = CalculateTree(
+                        debug, Path(file).stem, output, extern_threads, lazy, memory
+                    )
+                    if restore is not None:
+                        calc.restore_snapshot(Path(getcwd(), restore))
+                    # Streamed statements are parsed on their own, so their lines
+                    # don't match the file, the memory report needs the whole file
+                    if stream and memory is None:
+                        # Variable types can't be inferred from a single statement
+                        for tree in iter_statements(calc_parser, f):
+                            calc.visit(specialize(tree))
+                    else:
+                        code = f.read()
+                        if debug_source:
+                            print("debug-source>>", code)
+                        # Restored variables aren't assigned in the file,
+                        # so their types can't be inferred from it
+                        tree = specialize(
+                            calc_parser.parse(code), infer_vars=restore is None
+                        )
+                        calc.visit(tree)
+
+            except FileNotFoundError as e:
+                if not error_hook:
+                    raise MissingFile(file)
+                else:
+                    raise e
+    finally:
+        if calc is not None:
+            calc.close()
+        output.close()
+        if memory is not None:
+            if calc is not None:
+                print(memory.report(calc.vars, file), file=sys.stderr, flush=True)
+            memory.stop()
+
+
+@tools.callback()
+def tools_callback():
+    """MathLamp tools"""
+    sys.excepthook = lamp_error_hook
+
+
+@tools.command()
+def bundle(
+    package: Annotated[
+        str,
+        typer.Argument(help="A package in candlepkgs, or the path to a .lmp file"),
+    ],
+    output: Annotated[
+        Optional[str],
+        typer.Option("--output", "-o", help="The bundle file to write"),
+    ] = None,
+):
+    """Precompiles a package into a single-file bundle"""
+    from pathlib import Path
+
+    if package.lower().endswith(".lmp"):
+        source_file = Path(getcwd(), package)
     else:
-        try:
-            with open(str(Path(getcwd(), file)), "r", encoding="utf-8") as f:
-                code = f.read()
-                if debug_source:
-                    print("debug-source>>", code)
-                tree = calc_parser.parse(code)
-                CalculateTree(debug, Path(file).stem).visit(tree)
-
-        except FileNotFoundError as e:
-            if not error_hook:
+        source_file = Path(getcwd(), "candlepkgs", package + ".lmp")
+    if not source_file.exists():
+        raise MissingFile(str(source_file))
+    if output is None:
+        target = source_file.with_suffix(BUNDLE_SUFFIX)
+    else:
+        target = Path(getcwd(), output)
+    write_bundle(source_file.read_text(), target, lamp_parser(), specialize, BUNDLE_TAG)
+    symbols = LampBundle(target).symbols
+    console.print(
+        f"Bundled [bold cyan]{len(symbols)}[/bold cyan] functions into {target}"
+    )
+
+
+@tools.command()
+def watch(
+    file: Annotated[str, typer.Argument(help="The .lmp file to run")],
+    interval: Annotated[
+        float, typer.Option("--interval", help="Seconds between checks for changes")
+    ] = 0.5,
+):
+    """Runs a file and re-runs the changed statements every time it is saved"""
+    from pathlib import Path
+    from time import sleep
+
+    from lark.exceptions import UnexpectedInput
+
+    path = Path(getcwd(), file)
+    output = open_output()
+    calc = CalculateTree(DebugConfig(), path.stem, output)
+    session = IncrementalSession(calc, lamp_parser(), specialize)
+    modified = None
+    try:
+        while True:
+            try:
+                mtime = path.stat().st_mtime
+            except FileNotFoundError:
                 raise MissingFile(file)
-            else:
-                raise e
+            if mtime != modified:
+                modified = mtime
+                try:
+                    ran = len(session.run(path.read_text(encoding="utf-8")))
+                except (LampError, UnexpectedInput) as e:
+                    output.flush()
+                    console.print(f"[bold red]{e}[/bold red]")
+                except Exception as e:
+                    # Keeps watching after any error, the next save may fix it
+                    output.flush()
+                    console.print(f"[bold red]{type(e).__name__}: {e}[/bold red]")
+                else:
+                    output.flush()
+                    console.print(
+                        f"[dim]Ran {ran} of {len(session.statements)} statements, watching {file}[/dim]"
+                    )
+            sleep(interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        calc.close()
+        output.close()
+
+
+TOOL_COMMANDS = ("bundle", "watch")
+
+
+def cli():
+    """Entry point of the `lamp` command
+
+    Runs a tool when its name is the first argument, the interpreter otherwise
+    """
+    if len(sys.argv) > 1 and sys.argv[1] in TOOL_COMMANDS:
+        tools()
+    else:
+        app()
 
 
 if __name__ == "__main__":
-    app()
+    cli()
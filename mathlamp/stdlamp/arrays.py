@@ -0,0 +1,212 @@
+import operator
+from array import array
+from itertools import compress
+from typing import Callable, Iterable, Optional, Union
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+Buffer = Union[memoryview, array]
+
+INT_TYPECODES = frozenset("bBhHiIlLqQ")
+# Int results of NumPy at least this large are computed again in Python,
+# NumPy may have wrapped them around
+NUMPY_INT_LIMIT = 2.0**62
+
+
+def _is_int(value) -> bool:
+    if isinstance(value, LampArray):
+        return value.typecode in INT_TYPECODES
+    return isinstance(value, int)
+
+
+def numpy_apply(func: Callable, args: list) -> Optional["LampArray"]:
+    """Applies a NumPy function to arrays and scalars, with Python's semantics
+
+    NumPy gives inf or nan where Python raises (Ex. a division by zero)
+    and wraps ints that overflow, those results are None
+    so the caller computes them again in Python.
+
+    Args:
+            func (Callable): The function, called with NumPy views of the arrays
+            args (list): The arrays and scalars
+
+    Returns:
+            Optional[LampArray]: The result, None if it has to be computed in Python
+    """
+    views = [arg.to_numpy() if isinstance(arg, LampArray) else arg for arg in args]
+    try:
+        with numpy.errstate(all="raise"):
+            result = numpy.asarray(func(*views))
+            if result.dtype.kind in "iu" and result.size:
+                # The same operation on floats shows if the ints overflowed
+                floats = func(*(numpy.asarray(view, dtype="d") for view in views))
+                if numpy.abs(floats).max() >= NUMPY_INT_LIMIT:
+                    return None
+    except (ArithmeticError, TypeError, ValueError):
+        return None
+    return LampArray(memoryview(numpy.ascontiguousarray(result)))
+
+
+class LampArray:
+    __slots__ = ("data",)
+
+    def __init__(self, data: Buffer):
+        """Packed numeric array
+
+        Wraps a one dimensional buffer (a `memoryview` or an `array.array`)
+        without copying it, so arrays can point straight into memory-mapped files.
+        Arithmetic and comparisons are applied element by element,
+        with NumPy when it is installed. Results and errors are the same as
+        Python's either way (Ex. a division by zero raises `ZeroDivisionError`).
+
+        Args:
+                data (Buffer): The buffer holding the values
+        """
+        self.data = data
+
+    @classmethod
+    def from_values(cls, values: Iterable, typecode: str = "d") -> "LampArray":
+        """Creates an array by copying the values of an iterable
+
+        Args:
+                values (Iterable): The values
+                typecode (str): The `array` typecode of the values
+
+        Returns:
+                LampArray: The new array
+        """
+        return cls(array(typecode, values))
+
+    @property
+    def typecode(self) -> str:
+        """The `array` typecode of the values"""
+        if isinstance(self.data, memoryview):
+            return self.data.format
+        return self.data.typecode
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the values in bytes"""
+        return len(self.data) * self.data.itemsize
+
+    def tolist(self) -> list:
+        return self.data.tolist()
+
+    def to_numpy(self):
+        """Returns a NumPy view of the values, without copying them"""
+        return numpy.asarray(memoryview(self.data))
+
+    def filter(self, mask: "LampArray") -> "LampArray":
+        """Keeps the values where `mask` is true
+
+        Args:
+                mask (LampArray): A mask with the same length as the array
+
+        Returns:
+                LampArray: The kept values
+        """
+        if len(mask) != len(self):
+            raise ValueError(f"Mask has {len(mask)} values, expected {len(self)}")
+        if numpy is not None:
+            return LampArray(memoryview(self.to_numpy()[mask.to_numpy().astype(bool)]))
+        return LampArray(array(self.typecode, compress(self.data, mask.data)))
+
+    def _apply(self, other, op: Callable, typecode: str = None) -> "LampArray":
+        if isinstance(other, LampArray) and len(other) != len(self):
+            raise ValueError(
+                f"Can't combine arrays of {len(self)} and {len(other)} values"
+            )
+        if numpy is not None:
+            result = numpy_apply(op, [self, other])
+            if result is not None:
+                return result
+        if typecode is None:
+            typecode = "q" if _is_int(self) and _is_int(other) else "d"
+        if isinstance(other, LampArray):
+            values = map(op, self.data, other.data)
+        else:
+            values = [op(value, other) for value in self.data]
+        return LampArray(array(typecode, values))
+
+    def _apply_reflected(self, other, op: Callable) -> "LampArray":
+        return self._apply(other, lambda a, b: op(b, a))
+
+    def __add__(self, other):
+        return self._apply(other, operator.add)
+
+    def __radd__(self, other):
+        return self._apply_reflected(other, operator.add)
+
+    def __sub__(self, other):
+        return self._apply(other, operator.sub)
+
+    def __rsub__(self, other):
+        return self._apply_reflected(other, operator.sub)
+
+    def __mul__(self, other):
+        return self._apply(other, operator.mul)
+
+    def __rmul__(self, other):
+        return self._apply_reflected(other, operator.mul)
+
+    def __truediv__(self, other):
+        return self._apply(other, operator.truediv, "d")
+
+    def __rtruediv__(self, other):
+        return self._apply(other, lambda a, b: b / a, "d")
+
+    def __mod__(self, other):
+        return self._apply(other, operator.mod)
+
+    def __rmod__(self, other):
+        return self._apply_reflected(other, operator.mod)
+
+    def __pow__(self, other):
+        return self._apply(other, operator.pow)
+
+    def __rpow__(self, other):
+        return self._apply_reflected(other, operator.pow)
+
+    def __neg__(self):
+        return self._apply(-1, operator.mul)
+
+    # Comparisons return masks of 0 and 1
+    def __eq__(self, other):
+        return self._apply(other, operator.eq, "B")
+
+    def __ne__(self, other):
+        return self._apply(other, operator.ne, "B")
+
+    def __lt__(self, other):
+        return self._apply(other, operator.lt, "B")
+
+    def __le__(self, other):
+        return self._apply(other, operator.le, "B")
+
+    def __gt__(self, other):
+        return self._apply(other, operator.gt, "B")
+
+    def __ge__(self, other):
+        return self._apply(other, operator.ge, "B")
+
+    __hash__ = None
+
+    def __buffer__(self, flags: int) -> memoryview:
+        return memoryview(self.data)
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return LampArray(memoryview(self.data)[index])
+        return self.data[index]
+
+    def __repr__(self) -> str:
+        return repr(self.tolist())
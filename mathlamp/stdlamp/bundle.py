@@ -0,0 +1,129 @@
+import json
+import mmap
+import pickle
+from hashlib import sha256
+from pathlib import Path
+from typing import Callable, Optional
+
+from lark import Lark, Tree
+
+from mathlamp.stdlamp.stream import func_signature, iter_chunks
+
+BUNDLE_MAGIC = b"LAMPB\x01"
+# Magic, then the offset of the table of contents
+HEADER_SIZE = len(BUNDLE_MAGIC) + 8
+BUNDLE_SUFFIX = ".lampb"
+
+
+def source_hash(source: str) -> str:
+    return sha256(source.encode("utf-8")).hexdigest()
+
+
+def write_bundle(
+    source: str,
+    target: Path,
+    parser: Lark,
+    compile: Callable[[Tree], Tree],
+    tag: dict,
+):
+    """Precompiles a module into a bundle
+
+    A bundle holds the pickled tree of each function body, the pickled tree of the
+    other top-level statements and a JSON table of contents at the end of the file.
+
+    Args:
+            source (str): The module's source
+            target (Path): The bundle file to write
+            parser (Lark): A LALR parser of the MathLamp grammar
+            compile (Callable[[Tree], Tree]): Compiles a parsed tree (Ex. type inference)
+            tag (dict): The interpreter and grammar versions the bundle is built for
+    """
+    symbols = {}
+    statements = []
+    with target.open("wb") as f:
+        f.write(BUNDLE_MAGIC + bytes(8))
+
+        def write(value) -> list:
+            data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            offset = f.tell()
+            f.write(data)
+            return [offset, len(data)]
+
+        for _, chunk in iter_chunks(source.splitlines(keepends=True)):
+            signature = func_signature(chunk)
+            if signature is None:
+                statements.append(chunk)
+                continue
+            tree = compile(parser.parse(chunk))
+            if signature[0] in symbols:
+                # Calls find the first definition of a name, like with the source
+                continue
+            block = tree.children[-1]
+            symbols[signature[0]] = {
+                "params": signature[1],
+                "block": write(block),
+            }
+        module = compile(parser.parse("".join(statements)))
+        toc = {
+            **tag,
+            "hash": source_hash(source),
+            "module": write(module),
+            "symbols": symbols,
+        }
+        toc_offset = f.tell()
+        f.write(json.dumps(toc).encode("utf-8"))
+        f.seek(len(BUNDLE_MAGIC))
+        f.write(toc_offset.to_bytes(8, "little"))
+
+
+class LampBundle:
+    def __init__(self, path: Path):
+        """A precompiled module bundle
+
+        The file is memory-mapped and only the table of contents is read,
+        symbols are unpickled when they are loaded.
+
+        Args:
+                path (Path): The bundle file
+        """
+        self.path = path
+        with path.open("rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[: len(BUNDLE_MAGIC)] != BUNDLE_MAGIC:
+            raise ValueError(f"{path.name} is not a MathLamp bundle")
+        toc_offset = int.from_bytes(
+            self._map[len(BUNDLE_MAGIC) : HEADER_SIZE], "little"
+        )
+        self.toc = json.loads(self._map[toc_offset:].decode("utf-8"))
+
+    def __repr__(self) -> str:
+        return f"LampBundle({str(self.path)!r})"
+
+    @property
+    def symbols(self) -> dict:
+        """The functions of the bundle and their parameters"""
+        return {name: entry["params"] for name, entry in self.toc["symbols"].items()}
+
+    def matches(self, tag: dict) -> bool:
+        """Checks that the bundle was built for the given interpreter and grammar"""
+        return all(self.toc.get(key) == value for key, value in tag.items())
+
+    def _load(self, entry: list):
+        offset, length = entry
+        return pickle.loads(self._map[offset : offset + length])
+
+    def load_module(self) -> Tree:
+        """Loads the top-level statements that are not function definitions"""
+        return self._load(self.toc["module"])
+
+    def load_symbol(self, name: str) -> Tree:
+        """Loads the body of a function"""
+        return self._load(self.toc["symbols"][name]["block"])
+
+
+def find_bundle(module_file: Path) -> Optional[Path]:
+    """Returns the bundle built next to a module's source, if there is one"""
+    bundle = module_file.with_suffix(BUNDLE_SUFFIX)
+    if bundle.exists():
+        return bundle
+    return None
@@ -0,0 +1,203 @@
+import csv
+import mmap
+import sys
+from array import array
+from ast import literal_eval
+from itertools import islice
+from pathlib import Path
+from typing import Optional, Union
+
+from mathlamp.stdlamp.arrays import LampArray
+
+# Supported dtypes and their `array` typecodes
+DTYPES = {
+    "f8": "d",
+    "f4": "f",
+    "i8": "q",
+    "i4": "i",
+    "i2": "h",
+    "i1": "b",
+    "u8": "Q",
+    "u4": "I",
+    "u2": "H",
+    "u1": "B",
+}
+TYPECODES = {code: dtype for dtype, code in DTYPES.items()} | {"l": "i8", "L": "u8"}
+
+NPY_MAGIC = b"\x93NUMPY"
+BYTE_ORDER = "<" if sys.byteorder == "little" else ">"
+
+# Rows converted at once when reading CSV files
+CSV_CHUNK_ROWS = 1 << 14
+
+
+def _map_file(path: Path) -> memoryview:
+    with path.open("rb") as f:
+        if f.seek(0, 2) == 0:
+            return memoryview(b"")
+        # The map stays open for as long as a view of it is alive
+        return memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+
+def _typecode(dtype: str) -> str:
+    try:
+        return DTYPES[dtype]
+    except KeyError:
+        raise ValueError(f"Unknown dtype {dtype}, expected one of {list(DTYPES)}")
+
+
+def load_binary(path: Path, dtype: str = "f8") -> LampArray:
+    """Loads a raw array of native-endian numbers
+
+    The file is memory-mapped, the values are not copied.
+
+    Args:
+            path (Path): The file to load
+            dtype (str): The type of the values (Ex. `f8`, `i4`)
+
+    Returns:
+            LampArray: The loaded array
+    """
+    typecode = _typecode(dtype)
+    view = _map_file(path)
+    if len(view) % array(typecode).itemsize:
+        raise ValueError(f"Size of {path.name} is not a multiple of {dtype}")
+    return LampArray(view.cast(typecode))
+
+
+def load_npy(path: Path) -> LampArray:
+    """Loads a `.npy` file
+
+    The file is memory-mapped, the values are not copied.
+    Arrays with more than one dimension are loaded flattened, in C order,
+    so arrays saved in Fortran order can't be loaded.
+
+    Args:
+            path (Path): The file to load
+
+    Returns:
+            LampArray: The loaded array
+    """
+    view = _map_file(path)
+    if bytes(view[:6]) != NPY_MAGIC:
+        raise ValueError(f"{path.name} is not a .npy file")
+    if view[6] == 1:
+        header_len = int.from_bytes(view[8:10], "little")
+        offset = 10
+    else:
+        header_len = int.from_bytes(view[8:12], "little")
+        offset = 12
+    header = literal_eval(bytes(view[offset : offset + header_len]).decode("latin1"))
+    descr = header["descr"]
+    if header.get("fortran_order") and len(header.get("shape", ())) > 1:
+        raise ValueError(f"{path.name} is stored in Fortran order")
+    if descr[0] in "<>" and descr[0] != BYTE_ORDER:
+        raise ValueError(f"{path.name} has a non-native byte order ({descr})")
+    typecode = _typecode(descr.lstrip("<>|="))
+    return LampArray(view[offset + header_len :].cast(typecode))
+
+
+def load_csv(path: Path, column: Union[str, int] = 0) -> LampArray:
+    """Loads a CSV column as an array of floats
+
+    Rows are converted in chunks, so only one chunk of text is in memory at a time.
+    When the column is given by index, a first row that isn't a number is skipped
+    as a header.
+
+    Args:
+            path (Path): The file to load
+            column (Union[str, int]): The column's header name or its index
+
+    Returns:
+            LampArray: The loaded column
+    """
+    values = array("d")
+    with path.open("r", newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        if isinstance(column, str):
+            header = next(reader, [])
+            try:
+                column = header.index(column)
+            except ValueError:
+                raise ValueError(f"Column {column} not found in {path.name}")
+        else:
+            first = next((row for row in reader if row), None)
+            if first is not None:
+                try:
+                    values.append(float(first[column]))
+                except ValueError:
+                    pass
+                except IndexError:
+                    raise ValueError(f"Column {column} not found in {path.name}")
+        try:
+            while chunk := list(islice(reader, CSV_CHUNK_ROWS)):
+                values.fromlist([float(row[column]) for row in chunk if row])
+        except IndexError:
+            raise ValueError(f"Column {column} is missing on a row of {path.name}")
+    return LampArray(values)
+
+
+def load(path: Path, option: Optional[Union[str, int]] = None) -> LampArray:
+    """Loads a numeric dataset, picking the format from the file's extension
+
+    Args:
+            path (Path): The file to load
+            option (Optional[Union[str, int]]): The dtype of raw files or the column of CSV files
+
+    Returns:
+            LampArray: The loaded array
+    """
+    match path.suffix.lower():
+        case ".npy":
+            return load_npy(path)
+        case ".csv":
+            return load_csv(path, 0 if option is None else option)
+        case _:
+            return load_binary(path, "f8" if option is None else option)
+
+
+def _as_buffer(values) -> Union[memoryview, array]:
+    if isinstance(values, LampArray):
+        return values.data
+    if isinstance(values, list):
+        try:
+            return array("d", values)
+        except TypeError:
+            raise ValueError("Only numbers can be saved")
+    raise ValueError(f"Can't save a value of type {type(values).__name__}")
+
+
+def save(path: Path, values):
+    """Saves an array or a list of numbers, picking the format from the file's extension
+
+    Args:
+            path (Path): The file to write
+            values: The array or list to save
+    """
+    data = _as_buffer(values)
+    match path.suffix.lower():
+        case ".csv":
+            with path.open("w", encoding="utf-8") as f:
+                f.writelines(f"{value}\n" for value in data)
+        case ".npy":
+            typecode = data.format if isinstance(data, memoryview) else data.typecode
+            if typecode not in TYPECODES:
+                raise ValueError(f"Can't save values of type {typecode} as .npy")
+            header = repr(
+                {
+                    "descr": BYTE_ORDER + TYPECODES[typecode],
+                    "fortran_order": False,
+                    "shape": (len(data),),
+                }
+            )
+            # Pad the header so the data starts on a 64 byte boundary
+            header_len = len(header) + 1
+            header += " " * (-(10 + header_len) % 64) + "\n"
+            with path.open("wb") as f:
+                f.write(NPY_MAGIC + bytes([1, 0]))
+                f.write(len(header).to_bytes(2, "little"))
+                f.write(header.encode("latin1"))
+                f.write(data)
+        case _:
+            with path.open("wb") as f:
+                f.write(data)
@@ -101,6 +101,61 @@ class InvalidPackageProvider(LampError):
         super().__init__(self.msg, file)
 
 
+class InvalidData(LampError):
+    def __init__(self, reason: str, file: str):
+        """Error for a dataset that can't be loaded or saved
+        (Ex: an unknown dtype or a missing CSV column)
+
+        Args:
+                reason (str): Why the dataset is invalid
+                file (str): The file that the error ocurred
+        """
+        self.msg = f"Invalid data: {reason}"
+        super().__init__(self.msg, file)
+
+
+class InvalidBundle(LampError):
+    def __init__(self, bundle: str, reason: str, file: str):
+        """Error for a package bundle that can't be used
+        (Ex: a bundle built by another MathLamp version, without a source to fall back to)
+
+        Args:
+                bundle (str): The bundle file
+                reason (str): Why the bundle can't be used
+                file (str): The file that the error ocurred
+        """
+        self.msg = f"Can't use the bundle {bundle}: {reason}"
+        super().__init__(self.msg, file)
+
+
+class InvalidSnapshot(LampError):
+    def __init__(self, snapshot: str, reason: str, file: str):
+        """Error for a session snapshot that can't be restored
+        (Ex: a snapshot saved by another MathLamp version)
+
+        Args:
+                snapshot (str): The snapshot file
+                reason (str): Why the snapshot can't be restored
+                file (str): The file that the error ocurred
+        """
+        self.msg = f"Can't restore the snapshot {snapshot}: {reason}"
+        super().__init__(self.msg, file)
+
+
+class NativeError(LampError):
+    def __init__(self, func: str, reason: str, file: str):
+        """Error raised by a native built-in
+        (Ex: `math:factorial(-1)`)
+
+        Args:
+                func (str): The built-in
+                reason (str): The error of the built-in
+                file (str): The file that the error ocurred
+        """
+        self.msg = f"Error on {func}: {reason}"
+        super().__init__(self.msg, file)
+
+
 # Error hook
 def lamp_error_hook(exc_type, exc_value, exc_tb):
     if issubclass(exc_type, LampError):
@@ -111,8 +166,10 @@ def lamp_error_hook(exc_type, exc_value, exc_tb):
         token = exc_value.token
         line = token.line
         column = token.column
+        # Errors raised while streaming don't keep the parser
+        expected = exc_value.expected if parser is None else parser.accepts()
         rich.print(
-            f"[bold red]ERROR (InvalidSyntax) At line {line}, column {column}:\n Expected one of: {parser.accepts()}[/bold red]",
+            f"[bold red]ERROR (InvalidSyntax) At line {line}, column {column}:\n Expected one of: {expected}[/bold red]",
             file=sys.stderr,
         )
         exit(1)
@@ -0,0 +1,164 @@
+from copy import deepcopy
+from difflib import SequenceMatcher
+from typing import Callable
+
+from lark import Lark, Tree
+
+
+def _arg(node: Tree, index: int):
+    """Returns an argument of a call node, None if there's none"""
+    try:
+        return node.children[1].children[index]
+    except (AttributeError, IndexError):
+        return None
+
+
+def _str_arg(node: Tree, index: int):
+    """Returns a string literal argument of a node, None if it is something else"""
+    arg = _arg(node, index)
+    if isinstance(arg, Tree) and arg.data == "str":
+        return arg.children[0].value[1:-1]
+    return None
+
+
+def dependencies(tree) -> tuple:
+    """Finds the names a top-level statement reads and writes
+
+    Names are `(kind, name)` pairs where kind is `var`, `func`, `struct` or `module`.
+    Function definitions read everything their body reads,
+    so a function changes when a variable it uses changes.
+
+    Args:
+            tree: The statement's tree
+
+    Returns:
+            tuple: The set of read names and the set of written names
+    """
+    reads = set()
+    writes = set()
+    if not isinstance(tree, Tree):
+        return reads, writes
+    for node in tree.iter_subtrees():
+        match node.data:
+            case "var" | "struct_val":
+                reads.add(("var", node.children[0].value))
+            case "assign_var":
+                writes.add(("var", node.children[0].value))
+            case "assign_struct":
+                reads.add(("var", node.children[0].value))
+                writes.add(("var", node.children[0].value))
+            case "for_block":
+                writes.add(("var", node.children[0].children[0].value))
+            case "func_block":
+                writes.add(("func", node.children[0].value))
+            case "default_func":
+                reads.add(("func", node.children[0].value))
+                collection = _arg(node, 0) if node.children[0] == "append" else None
+                # append() changes the collection it is given
+                if isinstance(collection, Tree) and collection.data == "var":
+                    writes.add(("var", collection.children[0].value))
+            case "namespace_func":
+                reads.add(("module", node.children[0].value))
+                reads.add(("func", node.children[1].value))
+            case "struct":
+                writes.add(("struct", node.children[0].value))
+            case "struct_ref":
+                reads.add(("struct", node.children[1].value))
+            case "import_stmt":
+                writes.add(("module", node.children[0].value[1:].split(":")[-1]))
+            case "meta_function" if node.children[0].value == "extern":
+                name = _str_arg(node, 2)
+                if name is not None:
+                    writes.add(("func", name))
+    return reads, writes
+
+
+class IncrementalSession:
+    def __init__(self, calc, parser: Lark, compile: Callable[[Tree], Tree]):
+        """Re-runs a program, only evaluating the statements that changed
+
+        Each run parses the whole source and matches its top-level statements with
+        the previous run, in order (longest common subsequence). A statement runs again
+        when it isn't matched (new, edited or moved) or when it reads or writes a name
+        written by a statement that ran again or was removed. Other statements are
+        skipped and their variables, functions and structs are reused.
+
+        Args:
+                calc (CalculateTree): The interpreter that keeps the state between runs
+                parser (Lark): A LALR parser of the MathLamp grammar
+                compile (Callable[[Tree], Tree]): Compiles a parsed statement (Ex. type inference)
+        """
+        self.calc = calc
+        self.parser = parser
+        self.compile = compile
+        self.statements = []
+
+    def _forget(self, names: set):
+        """Removes the definitions of names so they can be defined again"""
+        calc = self.calc
+        for kind, name in names:
+            match kind:
+                case "func":
+                    calc.funcs = [
+                        func
+                        for func in calc.funcs
+                        if not (func["name"] == name and func["namespace"] == calc.file)
+                    ]
+                case "struct":
+                    calc.structs = [
+                        struct
+                        for struct in calc.structs
+                        if not (struct.name == name and struct.namespace == calc.file)
+                    ]
+                case "module":
+                    calc.funcs = [
+                        func for func in calc.funcs if not func["namespace"] == name
+                    ]
+                    calc.pending_modules.pop(name, None)
+
+    def run(self, source: str) -> list:
+        """Runs a new version of the program
+
+        Args:
+                source (str): The program's source
+
+        Returns:
+                list: The values of the statements that ran
+        """
+        tree = self.parser.parse(source)
+        if isinstance(tree, Tree) and tree.data == "start":
+            trees = tree.children
+        else:
+            trees = [tree]
+        matcher = SequenceMatcher(
+            None, [key for key, _ in self.statements], trees, autojunk=False
+        )
+        matched_old = set()
+        matched_new = set()
+        for old, new, size in matcher.get_matching_blocks():
+            matched_old.update(range(old, old + size))
+            matched_new.update(range(new, new + size))
+        changed = set()
+        for index, (_, deps) in enumerate(self.statements):
+            if index not in matched_old:
+                # The statement was removed, edited or moved
+                changed |= deps[1]
+        self._forget(changed)
+        for kind, name in changed:
+            if kind == "var":
+                self.calc.vars.pop(name, None)
+        statements = []
+        values = []
+        try:
+            for index, tree in enumerate(trees):
+                deps = dependencies(tree)
+                reads, writes = deps
+                if index not in matched_new or (reads | writes) & changed:
+                    self._forget(writes)
+                    values.append(self.calc.visit(self.compile(deepcopy(tree))))
+                    changed |= writes
+                statements.append((tree, deps))
+        finally:
+            # Statements after an error run again on the next run
+            self.statements = statements
+        return values
@@ -0,0 +1,176 @@
+from re import match
+
+from lark import Tree
+
+# Types found by the inference pass
+INT = "int"
+FLOAT = "float"
+STR = "str"
+LIST = "list"
+DICT = "dict"
+STRUCT = "struct"
+STRUCT_TYPE = "struct_type"
+# Not known before running the program
+UNKNOWN = "unknown"
+# No value reaches the expression yet, used while solving variable types
+PENDING = "pending"
+
+NUMERIC = frozenset((INT, FLOAT))
+
+# Iterations before giving up on variable types
+MAX_ITERATIONS = 16
+
+
+def _join(a: str, b: str) -> str:
+    if a == PENDING:
+        return b
+    if b == PENDING or a == b:
+        return a
+    return UNKNOWN
+
+
+def _arithmetic(op: str, a: str, b: str) -> str:
+    if PENDING in (a, b):
+        return PENDING
+    if a in NUMERIC and b in NUMERIC:
+        return INT if a == b == INT else FLOAT
+    if op == "add" and a == b and a in (STR, LIST):
+        return a
+    return UNKNOWN
+
+
+class TypeInference:
+    def __init__(self, infer_vars: bool = False):
+        """Static type inference pass
+
+        Finds the expressions that always have the same type and renames their nodes
+        to specialized `CalculateTree` methods that skip dynamic type checks
+        (Ex. `div` with two ints becomes `div_int`).
+        Everything else keeps the generic node.
+
+        Args:
+                infer_vars (bool): Infer the types of variables,
+                        only safe when the tree is the whole program
+        """
+        self.infer_vars = infer_vars
+        self.vars = {}
+        self.types = {}
+
+    def type_of(self, tree) -> str:
+        """Returns the inferred type of a node"""
+        return self.types.get(id(tree), UNKNOWN)
+
+    def run(self, tree) -> Tree:
+        """Infers the types of a tree and specializes it in place
+
+        Args:
+                tree (Tree): The parsed program
+
+        Returns:
+                Tree: The same tree
+        """
+        if not isinstance(tree, Tree):
+            return tree
+        nodes = list(tree.iter_subtrees())
+        # Functions of imported modules can assign any variable
+        infer_vars = self.infer_vars and not any(
+            node.data == "import_stmt" for node in nodes
+        )
+        dynamic = set()
+        assignments = []
+        for node in nodes:
+            match node.data:
+                case "assign_var":
+                    assignments.append(node)
+                case "for_block":
+                    dynamic.add(node.children[0].children[0].value)
+                case "params":
+                    dynamic.update(token.value for token in node.children)
+        if infer_vars:
+            self.vars = {node.children[0].value: PENDING for node in assignments}
+            self.vars.update(dict.fromkeys(dynamic, UNKNOWN))
+            for _ in range(MAX_ITERATIONS):
+                self._infer(nodes)
+                solved = dict.fromkeys(dynamic, UNKNOWN)
+                for node in assignments:
+                    name = node.children[0].value
+                    if name not in dynamic:
+                        solved[name] = _join(
+                            solved.get(name, PENDING),
+                            self._assigned(self.type_of(node.children[1])),
+                        )
+                if solved == self.vars:
+                    break
+                self.vars = solved
+            else:
+                self.vars = {}
+        self._infer(nodes)
+        for node in nodes:
+            self._specialize(node)
+        return tree
+
+    def _assigned(self, value_type: str) -> str:
+        # Assigning a struct declaration creates an instance
+        return STRUCT if value_type == STRUCT_TYPE else value_type
+
+    def _infer(self, nodes: list):
+        # iter_subtrees() lists children before their parents
+        for node in nodes:
+            self.types[id(node)] = self._node_type(node)
+
+    def _child(self, node: Tree, index: int) -> str:
+        child = node.children[index]
+        if isinstance(child, Tree):
+            return self.type_of(child)
+        return UNKNOWN
+
+    def _node_type(self, node: Tree) -> str:
+        match node.data:
+            case "number":
+                return FLOAT if match(r"[0-9]+\.[0-9]+", node.children[0]) else INT
+            case "str":
+                return STR
+            case "empty_list" | "single_list" | "add_item" | "add_code":
+                return LIST
+            case "empty_dict" | "dict_val":
+                return DICT
+            case "struct_ref":
+                return STRUCT_TYPE
+            case "add" | "sub" | "mul" | "mod":
+                return _arithmetic(
+                    node.data, self._child(node, 0), self._child(node, 1)
+                )
+            case "var":
+                return self.vars.get(node.children[0].value, UNKNOWN)
+        return UNKNOWN
+
+    def _specialize(self, node: Tree):
+        match node.data:
+            case "number":
+                node.data = f"number_{self.type_of(node)}"
+            case "div" if self._child(node, 0) == self._child(node, 1) == INT:
+                node.data = "div_int"
+            case "sqrt" if self._child(node, 0) == INT:
+                node.data = "sqrt_int"
+            case "repeat_block" | "for_block":
+                block = self._child(node, -1)
+                if block == LIST:
+                    node.data = f"{node.data}_list"
+                elif block not in (UNKNOWN, PENDING):
+                    node.data = f"{node.data}_value"
+            case "struct_val" if self.vars.get(node.children[0].value) == STRUCT:
+                node.data = "struct_val_instance"
+
+
+def specialize(tree, infer_vars: bool = False):
+    """Runs the type inference pass over a parsed program
+
+    Args:
+            tree (Tree): The parsed program
+            infer_vars (bool): Infer the types of variables,
+                    only safe when the tree is the whole program
+
+    Returns:
+            Tree: The specialized tree
+    """
+    return TypeInference(infer_vars).run(tree)
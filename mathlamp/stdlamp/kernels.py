@@ -0,0 +1,202 @@
+import math
+from array import array
+from itertools import repeat
+from typing import Callable, Optional
+
+from lark import Tree
+
+from mathlamp.stdlamp.arrays import LampArray, numpy, numpy_apply
+from mathlamp.stdlamp.natives import NATIVES
+
+# Operators of the arithmetic nodes
+OPERATORS = {
+    "add": "+",
+    "sub": "-",
+    "mul": "*",
+    "div": "/",
+    "div_int": "/",
+    "mod": "%",
+}
+
+# Built-ins that are applied to each element of an array
+PYTHON_FUNCS = {
+    "sqrt": math.sqrt,
+    **{
+        name: NATIVES["math"][name]["call"]
+        for name in (
+            "gcd",
+            "lcm",
+            "factorial",
+            "comb",
+            "perm",
+            "isqrt",
+            "floor",
+            "ceil",
+            "trunc",
+            "log",
+            "log2",
+            "log10",
+            "exp",
+            "hypot",
+            "pow",
+            "abs",
+            "isprime",
+        )
+    },
+}
+
+if numpy is not None:
+
+    def _numpy_log(x, base=None):
+        if base is None:
+            return numpy.log(x)
+        return numpy.log(x) / numpy.log(base)
+
+    # Built-ins with a NumPy ufunc, the others make the NumPy kernel fall back to Python
+    NUMPY_FUNCS = {
+        "sqrt": numpy.sqrt,
+        "gcd": numpy.gcd,
+        "lcm": numpy.lcm,
+        "floor": numpy.floor,
+        "ceil": numpy.ceil,
+        "trunc": numpy.trunc,
+        "log": _numpy_log,
+        "log2": numpy.log2,
+        "log10": numpy.log10,
+        "exp": numpy.exp,
+        "hypot": numpy.hypot,
+        "abs": numpy.abs,
+    }
+else:
+    NUMPY_FUNCS = {}
+
+
+class NotLiftable(Exception):
+    """A function body that can't be compiled into a kernel"""
+
+
+def _number(token: str):
+    try:
+        return int(token)
+    except ValueError:
+        return float(token)
+
+
+def _expression(node, params: dict, funcs: dict) -> str:
+    """Translates an expression into Python source
+
+    Params are renamed to `p0`, `p1`... and built-ins to `f_<name>`,
+    so the names are valid in Python
+
+    Raises:
+            NotLiftable: The expression uses something else than arithmetic
+                    on the params, numbers and the built-ins in `funcs`
+    """
+    if not isinstance(node, Tree):
+        raise NotLiftable(node)
+    match node.data:
+        case "number" | "number_int" | "number_float":
+            return repr(_number(node.children[0]))
+        case "var" if node.children[0].value in params:
+            return params[node.children[0].value]
+        case "add" | "sub" | "mul" | "div" | "div_int" | "mod":
+            a = _expression(node.children[0], params, funcs)
+            b = _expression(node.children[1], params, funcs)
+            return f"({a} {OPERATORS[node.data]} {b})"
+        case "pow" if len(node.children) == 2:
+            a = _expression(node.children[0], params, funcs)
+            b = _expression(node.children[1], params, funcs)
+            return f"({a} ** {b})"
+        case "pow":
+            return _call("pow", node.children, params, funcs)
+        case "sqrt" | "sqrt_int":
+            return _call("sqrt", node.children, params, funcs)
+        case "namespace_func" if node.children[0].value == "math":
+            args = node.children[2].children if len(node.children) > 2 else []
+            return _call(node.children[1].value, args, params, funcs)
+    raise NotLiftable(node.data)
+
+
+def _call(name: str, args: list, params: dict, funcs: dict) -> str:
+    if name not in funcs:
+        raise NotLiftable(name)
+    args = ", ".join(_expression(arg, params, funcs) for arg in args)
+    return f"f_{name}({args})"
+
+
+def _compile(params: list, body: Tree, funcs: dict) -> Callable:
+    names = {param: f"p{i}" for i, param in enumerate(params)}
+    source = f"lambda {', '.join(names.values())}: {_expression(body, names, funcs)}"
+    scope = {f"f_{name}": func for name, func in funcs.items()}
+    return eval(source, scope)
+
+
+def to_array(values: list) -> LampArray:
+    """Packs the results of a kernel, as ints when every result is an int"""
+    try:
+        return LampArray(array("q", values))
+    except (TypeError, OverflowError):
+        return LampArray(array("d", values))
+
+
+class Kernel:
+    def __init__(self, params: list, body: Tree, use_numpy: bool = True):
+        """A function body compiled into a whole-array kernel
+
+        The body is translated into a NumPy expression, applied once to the whole
+        arrays, and into a Python function mapped over the elements.
+        The Python function is used when NumPy isn't installed, when the body uses
+        a built-in without a NumPy ufunc, or when NumPy fails or its result differs
+        from Python's (Ex. `gcd` of floats, a division by zero or an int overflow).
+
+        Ex. `func f(x) { pow(x, 2) * 3 + sqrt(x) }`
+
+        Args:
+                params (list): The function's params
+                body (Tree): The function's body
+                use_numpy (bool): Compile the NumPy expression if NumPy is installed
+
+        Raises:
+                NotLiftable: The body isn't a single expression of arithmetic
+                        and math built-ins on the params
+        """
+        body = _body(body)
+        self.params = params
+        self.python = _compile(params, body, PYTHON_FUNCS)
+        self.numpy = None
+        if use_numpy and numpy is not None:
+            try:
+                self.numpy = _compile(params, body, NUMPY_FUNCS)
+            except NotLiftable:
+                pass
+
+    def __call__(self, args: list) -> LampArray:
+        """Applies the kernel to arrays, other arguments are the same for every element
+
+        Raises:
+                ValueError: The arrays have different lengths
+        """
+        lengths = {len(arg) for arg in args if isinstance(arg, LampArray)}
+        if len(lengths) > 1:
+            raise ValueError(f"Can't combine arrays of {sorted(lengths)} values")
+        if self.numpy is not None:
+            result = numpy_apply(self.numpy, args)
+            if result is not None:
+                return result
+        columns = [arg if isinstance(arg, LampArray) else repeat(arg) for arg in args]
+        return to_array(list(map(self.python, *columns)))
+
+
+def _body(block) -> Tree:
+    # A block with more than one statement is an `add_code` node
+    if not isinstance(block, Tree) or block.data == "add_code":
+        raise NotLiftable(block)
+    return block
+
+
+def lift(params: list, block, use_numpy: bool = True) -> Optional[Kernel]:
+    """Compiles a function body into a kernel, None if it can't be lifted"""
+    try:
+        return Kernel(params, block, use_numpy)
+    except NotLiftable:
+        return None
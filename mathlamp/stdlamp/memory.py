@@ -0,0 +1,153 @@
+import sys
+import tracemalloc
+from typing import Optional
+
+from mathlamp.stdlamp.arrays import LampArray
+from mathlamp.stdlamp.structs import StructColumns, StructInstance, struct_values
+
+# Rows of each table of the report
+REPORT_ROWS = 10
+
+
+def value_size(value, seen: Optional[set] = None) -> int:
+    """Returns the size of a value and everything it holds, in bytes
+
+    Values held more than once are counted once
+    """
+    if seen is None:
+        seen = set()
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    size = sys.getsizeof(value)
+    if isinstance(value, LampArray):
+        size += value.nbytes
+    elif isinstance(value, StructColumns):
+        size += sum(value_size(column, seen) for column in value.columns.values())
+    elif isinstance(value, StructInstance):
+        size += sum(
+            value_size(member, seen) for member in struct_values(value).values()
+        )
+    elif isinstance(value, dict):
+        size += sum(
+            value_size(key, seen) + value_size(val, seen) for key, val in value.items()
+        )
+    elif isinstance(value, (list, tuple, set)):
+        size += sum(value_size(item, seen) for item in value)
+    return size
+
+
+def format_size(size: int) -> str:
+    if abs(size) < 1024:
+        return f"{size} B"
+    for unit in ("KiB", "MiB"):
+        size /= 1024
+        if abs(size) < 1024:
+            return f"{size:.1f} {unit}"
+    return f"{size / 1024:.1f} GiB"
+
+
+def largest_values(variables: dict, rows: int = REPORT_ROWS) -> list:
+    """Returns the names and sizes of the largest variables, largest first"""
+    sizes = [(name, value_size(value)) for name, value in variables.items()]
+    return sorted(sizes, key=lambda item: item[1], reverse=True)[:rows]
+
+
+class MemoryTracker:
+    def __init__(self):
+        """Attributes the memory allocated while running a program to its source lines
+
+        Built on `tracemalloc`. The interpreter calls `enter()` every time it starts
+        evaluating a node on another line, the memory allocated and the peak reached
+        since the previous call are added to the line that was running.
+        Allocations are only counted on the innermost line (Ex. a loop's body, not the loop).
+        """
+        self.line = None
+        # [peak, allocated] by line, peaks are relative to the memory when the line started
+        self.lines = {}
+        # Memory allocated by the assignments of each variable
+        self.vars = {}
+        self.peak = 0
+        self._current = 0
+
+    def start(self):
+        tracemalloc.start()
+        self._current = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+
+    def stop(self):
+        self._record()
+        tracemalloc.stop()
+
+    def _record(self):
+        current, peak = tracemalloc.get_traced_memory()
+        if self.line is not None:
+            stats = self.lines.setdefault(self.line, [0, 0])
+            stats[0] = max(stats[0], peak - self._current)
+            stats[1] += max(current - self._current, 0)
+        self.peak = max(self.peak, peak)
+        tracemalloc.reset_peak()
+        self._current = current
+
+    def enter(self, line: Optional[int]) -> Optional[int]:
+        """Switches to another line
+
+        Args:
+                line (Optional[int]): The line that starts running
+
+        Returns:
+                Optional[int]: The line that was running, to go back to it
+        """
+        self._record()
+        previous = self.line
+        self.line = line
+        return previous
+
+    def assigned(self, name: str, size: int):
+        """Adds memory allocated by an assignment to a variable"""
+        if size > 0:
+            self.vars[name] = self.vars.get(name, 0) + size
+
+    def traced(self) -> tuple:
+        """The current traced memory and the peak since the tracker started"""
+        self._record()
+        return self._current, self.peak
+
+    def report(self, variables: dict, file: str) -> str:
+        """Formats the report of a finished program
+
+        Args:
+                variables (dict): The variables that are still live
+                file (str): The program's file
+
+        Returns:
+                str: The report
+        """
+        current, peak = self.traced()
+        lines = [f"Memory report of {file}"]
+        lines.append(f"  traced: {format_size(current)}, peak {format_size(peak)}")
+        lines.append("Lines (peak, allocated):")
+        by_line = sorted(
+            self.lines.items(), key=lambda item: (item[1][0], item[1][1]), reverse=True
+        )
+        for line, (line_peak, allocated) in by_line[:REPORT_ROWS]:
+            lines.append(
+                f"  {file}:{line}: {format_size(line_peak)}, {format_size(allocated)}"
+            )
+        lines.append("Variables (live size, allocated by assignments):")
+        for name, size in largest_values(variables):
+            lines.append(
+                f"  {name}: {format_size(size)}, {format_size(self.vars.get(name, 0))}"
+            )
+        return "\n".join(lines)
+
+
+def checkpoint(variables: dict, tracker: Optional[MemoryTracker] = None) -> str:
+    """Formats a `@debug("mem")` checkpoint, with the largest live variables"""
+    values = ", ".join(
+        f"{name}={format_size(size)}" for name, size in largest_values(variables)
+    )
+    if tracker is None:
+        return f"{{{values}}}"
+    current, peak = tracker.traced()
+    return f"traced {format_size(current)}, peak {format_size(peak)}, {{{values}}}"
@@ -0,0 +1,163 @@
+import math
+from math import isqrt
+from typing import Callable, Optional
+
+# Namespace of the built-ins called without a namespace (Ex. `sum(x)`)
+GLOBAL = ""
+
+# Native built-ins by namespace and name
+NATIVES = {}
+
+
+def register(namespace: str, name: str, call: Callable):
+    """Registers a native built-in
+
+    Native built-ins are looked up in a dict by namespace and name,
+    so calling them doesn't go through the interpreter's function list.
+
+    Args:
+            namespace (str): The namespace of the built-in, `GLOBAL` for no namespace
+            name (str): The name of the built-in
+            call (Callable): The Python callable, called with the evaluated arguments
+    """
+    NATIVES.setdefault(namespace, {})[name] = {
+        "name": name,
+        "params": None,
+        "namespace": namespace,
+        "module": "native",
+        "lang": "native",
+        "call": call,
+    }
+
+
+def native(namespace: str, name: Optional[str] = None):
+    """Decorator version of `register()`, the name defaults to the function's name"""
+
+    def decorator(call: Callable) -> Callable:
+        register(namespace, name or call.__name__, call)
+        return call
+
+    return decorator
+
+
+def find_native(namespace: str, name: str) -> Optional[dict]:
+    """Returns the function dict of a native built-in, None if there's none"""
+    natives = NATIVES.get(namespace)
+    if natives is None:
+        return None
+    return natives.get(name)
+
+
+# Miller-Rabin bases, deterministic for every n < PRIME_BASES_LIMIT
+PRIME_BASES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+PRIME_BASES_LIMIT = 3317044064679887385961981
+
+
+def _jacobi(a: int, n: int) -> int:
+    """Jacobi symbol (a/n) of an odd n"""
+    a %= n
+    result = 1
+    while a:
+        while a % 2 == 0:
+            a //= 2
+            if n % 8 in (3, 5):
+                result = -result
+        a, n = n, a
+        if a % 4 == 3 and n % 4 == 3:
+            result = -result
+        a %= n
+    return result if n == 1 else 0
+
+
+def _half(x: int, n: int) -> int:
+    """x / 2 mod n, for an odd n"""
+    if x % 2:
+        x += n
+    return x // 2 % n
+
+
+def _strong_lucas(n: int) -> bool:
+    """Strong Lucas probable prime test of an odd n, with Selfridge's parameters"""
+    if isqrt(n) ** 2 == n:
+        return False
+    d = 5
+    while (jacobi := _jacobi(d, n)) != -1:
+        if jacobi == 0 and abs(d) != n:
+            return False
+        d = -d - 2 if d > 0 else -d + 2
+    p = 1
+    q = (1 - d) // 4
+    k = n + 1
+    s = 0
+    while k % 2 == 0:
+        k //= 2
+        s += 1
+    # U and V of the Lucas sequences and Q^i, for the leading bits i of k
+    u, v, qk = 1, p, q % n
+    for bit in bin(k)[3:]:
+        u, v = u * v % n, (v * v - 2 * qk) % n
+        qk = qk * qk % n
+        if bit == "1":
+            u, v = _half(p * u + v, n), _half(d * u + p * v, n)
+            qk = qk * q % n
+    if u == 0 or v == 0:
+        return True
+    for _ in range(s - 1):
+        v = (v * v - 2 * qk) % n
+        if v == 0:
+            return True
+        qk = qk * qk % n
+    return False
+
+
+@native("math")
+def isprime(n: int) -> bool:
+    """Checks if n is prime
+
+    Exact below `PRIME_BASES_LIMIT` (about 3.3 * 10^24). Larger numbers also need
+    to pass a strong Lucas test, together the Baillie-PSW test:
+    it has no known counterexample, but it isn't proven for every n.
+    """
+    if n < 2:
+        return False
+    for p in PRIME_BASES:
+        if n % p == 0:
+            return n == p
+    d = n - 1
+    s = 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+    for a in PRIME_BASES:
+        x = pow(a, d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(s - 1):
+            x = pow(x, 2, n)
+            if x == n - 1:
+                break
+        else:
+            return False
+    return n < PRIME_BASES_LIMIT or _strong_lucas(n)
+
+
+for _name in (
+    "gcd",
+    "lcm",
+    "factorial",
+    "comb",
+    "perm",
+    "isqrt",
+    "fsum",
+    "floor",
+    "ceil",
+    "trunc",
+    "log",
+    "log2",
+    "log10",
+    "exp",
+    "hypot",
+):
+    register("math", _name, getattr(math, _name))
+register("math", "pow", pow)
+register("math", "abs", abs)
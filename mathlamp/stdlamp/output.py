@@ -0,0 +1,131 @@
+import sys
+import json
+from abc import ABC, abstractmethod
+from enum import Enum
+from typing import Any, Iterable, Optional, TextIO
+
+# Characters held in memory before the buffer is written to the stream
+DEFAULT_BUFFER_SIZE = 1 << 16
+
+
+class OutputFormat(str, Enum):
+    text = "text"
+    jsonl = "jsonl"
+
+
+class LampOutput(ABC):
+    def __init__(
+        self,
+        stream: TextIO,
+        buffer_size: int = DEFAULT_BUFFER_SIZE,
+        close_stream: bool = False,
+    ):
+        """Base class for MathLamp output sinks
+
+        Values are formatted with `format()` and kept in memory until
+        `buffer_size` characters are pending, then written in a single call.
+
+        Args:
+                stream (TextIO): The stream that receives the output
+                buffer_size (int): Pending characters before a flush, 0 flushes every write
+                close_stream (bool): Close the stream when the sink is closed
+        """
+        self.stream = stream
+        self.buffer_size = buffer_size
+        self.close_stream = close_stream
+        self._buffer = []
+        self._pending = 0
+
+    @abstractmethod
+    def format(self, value: Any) -> str:
+        """Formats a single value as a line of output
+
+        Args:
+                value (Any): The value to format
+
+        Returns:
+                str: The formatted line, including the line break
+        """
+
+    def write(self, value: Any):
+        """Writes a single value
+
+        Args:
+                value (Any): The value to write
+        """
+        line = self.format(value)
+        self._buffer.append(line)
+        self._pending += len(line)
+        if self._pending >= self.buffer_size:
+            self.flush()
+
+    def write_all(self, values: Iterable[Any]):
+        """Writes every value of an iterable, one per line
+
+        Args:
+                values (Iterable[Any]): The values to write
+        """
+        for value in values:
+            self.write(value)
+
+    def flush(self):
+        """Writes the pending output to the stream"""
+        if self._buffer:
+            self.stream.write("".join(self._buffer))
+            self._buffer.clear()
+            self._pending = 0
+        self.stream.flush()
+
+    def close(self):
+        """Flushes the pending output and closes the stream if it is owned"""
+        self.flush()
+        if self.close_stream:
+            self.stream.close()
+
+
+class TextOutput(LampOutput):
+    """Plain text output, same as `print()`"""
+
+    def format(self, value: Any) -> str:
+        return f"{value}\n"
+
+
+class JsonLinesOutput(LampOutput):
+    """JSON lines output, one JSON document per value"""
+
+    def format(self, value: Any) -> str:
+        return json.dumps(value, default=_json_default) + "\n"
+
+
+def _json_default(value: Any):
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    return str(value)
+
+
+OUTPUT_FORMATS = {
+    OutputFormat.text: TextOutput,
+    OutputFormat.jsonl: JsonLinesOutput,
+}
+
+
+def open_output(
+    file: Optional[str] = None,
+    format: OutputFormat = OutputFormat.text,
+    buffer_size: int = DEFAULT_BUFFER_SIZE,
+) -> LampOutput:
+    """Creates an output sink
+
+    Args:
+            file (Optional[str]): The file to write to, stdout if not provided
+            format (OutputFormat): The output format
+            buffer_size (int): Pending characters before a flush
+
+    Returns:
+            LampOutput: The output sink
+    """
+    sink = OUTPUT_FORMATS[OutputFormat(format)]
+    if file is None:
+        return sink(sys.stdout, buffer_size)
+    stream = open(file, "w", encoding="utf-8")
+    return sink(stream, buffer_size, close_stream=True)
@@ -0,0 +1,152 @@
+import math
+import operator
+import statistics
+from array import array
+from functools import wraps
+from itertools import accumulate
+from typing import Callable
+
+from mathlamp.stdlamp.arrays import INT_TYPECODES, LampArray, numpy
+from mathlamp.stdlamp.natives import GLOBAL, register
+from mathlamp.stdlamp.structs import StructColumns
+
+
+def _values(values):
+    """Returns the values to reduce, dicts are reduced over their values"""
+    if isinstance(values, dict):
+        return list(values.values())
+    return values
+
+
+def _numpy(values):
+    """Returns a NumPy view of an array, None when NumPy can't be used"""
+    if numpy is not None and isinstance(values, LampArray):
+        return values.to_numpy()
+    return None
+
+
+def _all_ints(values) -> bool:
+    if isinstance(values, LampArray):
+        return values.typecode in INT_TYPECODES
+    return all(isinstance(value, int) for value in values)
+
+
+def reduction(name: str):
+    """Registers a reduction without a namespace and in the `math` namespace
+
+    Struct columns are reduced column by column, into a dict by member
+    """
+
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def reduce(values, *args):
+            if isinstance(values, StructColumns):
+                return {
+                    member: func(column, *args)
+                    for member, column in values.columns.items()
+                }
+            return func(_values(values), *args)
+
+        register(GLOBAL, name, reduce)
+        register("math", name, reduce)
+        return func
+
+    return decorator
+
+
+@reduction("sum")
+def lamp_sum(values):
+    # Ints are summed exactly, floats with fsum so rounding errors don't add up
+    if _all_ints(values):
+        return sum(values)
+    return math.fsum(values)
+
+
+@reduction("prod")
+def lamp_prod(values):
+    return math.prod(values)
+
+
+@reduction("min")
+def lamp_min(values):
+    view = _numpy(values)
+    if view is not None:
+        return view.min().item()
+    return min(values)
+
+
+@reduction("max")
+def lamp_max(values):
+    view = _numpy(values)
+    if view is not None:
+        return view.max().item()
+    return max(values)
+
+
+@reduction("argmax")
+def lamp_argmax(values):
+    view = _numpy(values)
+    if view is not None:
+        if len(view) == 0:
+            raise ValueError("argmax() of an empty sequence")
+        return int(view.argmax())
+    if not len(values):
+        raise ValueError("argmax() of an empty sequence")
+    return max(range(len(values)), key=values.__getitem__)
+
+
+@reduction("mean")
+def lamp_mean(values):
+    return statistics.fmean(values)
+
+
+@reduction("variance")
+def lamp_variance(values):
+    # Sample variance, like statistics.variance()
+    view = _numpy(values)
+    if view is not None:
+        if len(view) < 2:
+            raise ValueError("variance requires at least two data points")
+        return view.var(ddof=1).item()
+    return statistics.variance(values)
+
+
+@reduction("cumsum")
+def lamp_cumsum(values):
+    view = _numpy(values)
+    if view is not None:
+        return LampArray(memoryview(view.cumsum()))
+    if isinstance(values, LampArray):
+        return LampArray(array(values.typecode, accumulate(values)))
+    return list(accumulate(values))
+
+
+@reduction("sort")
+def lamp_sort(values):
+    view = _numpy(values)
+    if view is not None:
+        return LampArray(memoryview(numpy.sort(view)))
+    if isinstance(values, LampArray):
+        return LampArray(array(values.typecode, sorted(values)))
+    return sorted(values)
+
+
+def lamp_dot(a, b):
+    a = _values(a)
+    b = _values(b)
+    if len(a) != len(b):
+        raise ValueError(f"Can't multiply {len(a)} values by {len(b)} values")
+    view_a = _numpy(a)
+    view_b = _numpy(b)
+    if view_a is not None and view_b is not None:
+        return numpy.dot(view_a, view_b).item()
+    if _all_ints(a) and _all_ints(b):
+        return sum(map(int.__mul__, a, b))
+    if hasattr(math, "sumprod"):
+        # Extended precision products and sum, like fsum (Python 3.12+)
+        return math.sumprod(a, b)
+    return math.fsum(map(operator.mul, a, b))
+
+
+register(GLOBAL, "dot", lamp_dot)
+register("math", "dot", lamp_dot)
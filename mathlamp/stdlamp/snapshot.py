@@ -0,0 +1,118 @@
+import io
+import json
+import mmap
+import pickle
+from pathlib import Path
+
+from mathlamp.stdlamp.arrays import LampArray
+from mathlamp.stdlamp.bundle import LampBundle
+
+SNAPSHOT_MAGIC = b"LAMPS\x01"
+# Magic, then the offset of the table of contents
+HEADER_SIZE = len(SNAPSHOT_MAGIC) + 8
+# Arrays start on a cache line, so they can be used straight from the mapping
+ARRAY_ALIGNMENT = 64
+
+
+class _SnapshotPickler(pickle.Pickler):
+    def __init__(self, file, data):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.data = data
+        # Arrays shared by several values are written once
+        self.arrays = {}
+
+    def persistent_id(self, obj):
+        if isinstance(obj, LampArray):
+            if id(obj) in self.arrays:
+                return self.arrays[id(obj)]
+            padding = -self.data.tell() % ARRAY_ALIGNMENT
+            self.data.write(bytes(padding))
+            offset = self.data.tell()
+            view = memoryview(obj.data)
+            # Strided arrays (Ex. `a[::2]`) are packed when they are written
+            self.data.write(view.cast("B") if view.c_contiguous else view.tobytes())
+            pid = ("array", obj.typecode.lstrip("@="), offset, obj.nbytes)
+            self.arrays[id(obj)] = pid
+            return pid
+        if isinstance(obj, LampBundle):
+            return ("bundle", str(obj.path))
+        return None
+
+
+class _SnapshotUnpickler(pickle.Unpickler):
+    def __init__(self, file, data: mmap.mmap):
+        super().__init__(file)
+        self.data = memoryview(data)
+        self.arrays = {}
+
+    def persistent_load(self, pid):
+        match pid:
+            case ("array", typecode, offset, length):
+                if pid not in self.arrays:
+                    self.arrays[pid] = LampArray(
+                        self.data[offset : offset + length].cast(typecode)
+                    )
+                return self.arrays[pid]
+            case ("bundle", path):
+                return LampBundle(Path(path))
+        raise pickle.UnpicklingError(f"Unknown snapshot object {pid!r}")
+
+
+def write_snapshot(state: dict, target: Path, tag: dict):
+    """Saves the state of an interpreter into a snapshot
+
+    Arrays are written raw into an aligned data section, everything else
+    (variables, functions with their compiled blocks, structs and pending modules)
+    is pickled after it, followed by a JSON table of contents.
+
+    Args:
+            state (dict): The state to save, see `CalculateTree.save_snapshot()`
+            target (Path): The snapshot file to write
+            tag (dict): The interpreter and grammar versions of the session
+    """
+    with target.open("wb") as f:
+        f.write(SNAPSHOT_MAGIC + bytes(8))
+        state_buffer = io.BytesIO()
+        _SnapshotPickler(state_buffer, f).dump(state)
+        state_offset = f.tell()
+        f.write(state_buffer.getbuffer())
+        toc = {**tag, "state": [state_offset, state_buffer.tell()]}
+        toc_offset = f.tell()
+        f.write(json.dumps(toc).encode("utf-8"))
+        f.seek(len(SNAPSHOT_MAGIC))
+        f.write(toc_offset.to_bytes(8, "little"))
+
+
+class LampSnapshot:
+    def __init__(self, path: Path):
+        """A saved interpreter session
+
+        The file is mapped copy-on-write, so restored arrays point into the mapping
+        and are only read from disk when they are used.
+
+        Args:
+                path (Path): The snapshot file
+        """
+        self.path = path
+        with path.open("rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        if self._map[: len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+            raise ValueError(f"{path.name} is not a MathLamp snapshot")
+        toc_offset = int.from_bytes(
+            self._map[len(SNAPSHOT_MAGIC) : HEADER_SIZE], "little"
+        )
+        self.toc = json.loads(self._map[toc_offset:].decode("utf-8"))
+
+    def __repr__(self) -> str:
+        return f"LampSnapshot({str(self.path)!r})"
+
+    def matches(self, tag: dict) -> bool:
+        """Checks that the snapshot was saved by the given interpreter and grammar"""
+        return all(self.toc.get(key) == value for key, value in tag.items())
+
+    def load(self) -> dict:
+        """Loads the saved state"""
+        offset, length = self.toc["state"]
+        return _SnapshotUnpickler(
+            io.BytesIO(self._map[offset : offset + length]), self._map
+        ).load()
@@ -0,0 +1,218 @@
+import re
+from typing import Iterable, Iterator, Optional
+
+from lark import Lark, Tree
+from lark.exceptions import UnexpectedInput, UnexpectedToken
+from lark.parsers.lalr_interactive_parser import InteractiveParser
+
+OPENING = frozenset("({[")
+CLOSING = frozenset(")}]")
+
+
+def _scan(line: str, depth: int, in_string: bool) -> tuple:
+    """Updates the bracket depth and string state after a line"""
+    previous = ""
+    for char in line:
+        if in_string:
+            if char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == "/" and previous == "/":
+            # Rest of the line is a comment
+            break
+        elif char in OPENING:
+            depth += 1
+        elif char in CLOSING:
+            depth -= 1
+        previous = char
+    return depth, in_string
+
+
+def iter_chunks(lines: Iterable[str]) -> Iterator[tuple]:
+    """Groups source lines into chunks that end outside of brackets and strings
+
+    Args:
+            lines (Iterable[str]): The source lines, with their line breaks
+
+    Yields:
+            tuple: The line number where the chunk starts and the chunk's source
+    """
+    buffer = []
+    start = 1
+    depth = 0
+    in_string = False
+    for number, line in enumerate(lines, 1):
+        if not buffer:
+            start = number
+        buffer.append(line)
+        depth, in_string = _scan(line, depth, in_string)
+        if depth <= 0 and not in_string:
+            yield start, "".join(buffer)
+            buffer.clear()
+            depth = 0
+    if buffer:
+        yield start, "".join(buffer)
+
+
+def _shift_lines(error: UnexpectedInput, offset: int):
+    # Errors at the end of the input don't have a line
+    if getattr(error, "line", -1) > 0:
+        error.line += offset
+    token = getattr(error, "token", None)
+    if token is not None and token.line is not None:
+        token.line += offset
+
+
+def _continues(
+    parser: Lark, statement: InteractiveParser, following: str
+) -> Optional[bool]:
+    """Checks if the first token of `following` continues a complete statement
+
+    The LALR parser only reduces the statement into the program's list of statements
+    when the next token starts another statement, so this cuts statements exactly
+    where parsing the whole file would (Ex. `out(x)` followed by `-1` is a subtraction).
+
+    Args:
+            parser (Lark): A LALR parser of the MathLamp grammar
+            statement (InteractiveParser): The parser after the statement's last token
+            following (str): The next chunk
+
+    Returns:
+            Optional[bool]: None if `following` is only whitespace and comments
+    """
+    probe = statement.copy()
+    try:
+        # Lexed in the state after the statement, like in a whole file
+        lexer = parser.parse_interactive(following).lexer_thread
+        token = next(lexer.lex(probe.parser_state), None)
+        if token is None:
+            return None
+        probe.feed_token(token)
+    except UnexpectedInput:
+        # The error is raised again when the next statement is parsed
+        return False
+    return not any(
+        isinstance(value, Tree) and value.data.startswith("__start_star")
+        for value in probe.parser_state.value_stack
+    )
+
+
+def iter_statements(parser: Lark, lines: Iterable[str]) -> Iterator[Tree]:
+    """Parses top-level statements one at a time
+
+    Lines are read as they are needed and each chunk is fed to Lark's interactive
+    parser, so only the statement being parsed is kept in memory.
+    A chunk that can't end the program yet (Ex. `x = 1 +`)
+    continues on the next one, and so does a complete statement when
+    the next chunk extends it (Ex. `x = 1` followed by `+ 2`).
+
+    Args:
+            parser (Lark): A LALR parser of the MathLamp grammar
+            lines (Iterable[str]): The source lines, with their line breaks
+
+    Yields:
+            Tree: The tree of each statement
+    """
+    pending = ""
+    start = 1
+    # The tree of `pending` when it's a complete statement, and its parser
+    complete = None
+    interactive = None
+    for number, chunk in iter_chunks(lines):
+        if complete is not None:
+            continues = _continues(parser, interactive, chunk)
+            if continues is None:
+                pending += chunk
+                continue
+            if not continues:
+                yield complete
+                pending = ""
+                complete = None
+        if not pending:
+            start = number
+        pending += chunk
+        if not pending.strip():
+            pending = ""
+            continue
+        try:
+            interactive = parser.parse_interactive(pending)
+            interactive.exhaust_lexer()
+            complete = interactive.copy().feed_eof()
+        except UnexpectedToken as e:
+            if e.token.type == "$END":
+                # The statement continues on the next chunk
+                complete = None
+                continue
+            _shift_lines(e, start - 1)
+            raise
+        except UnexpectedInput as e:
+            _shift_lines(e, start - 1)
+            raise
+    if complete is not None:
+        yield complete
+    elif pending.strip():
+        try:
+            yield parser.parse(pending)
+        except UnexpectedInput as e:
+            _shift_lines(e, start - 1)
+            raise
+
+
+FUNC_HEADER = re.compile(
+    r"\s*func\s+(?P<name>[a-zA-Z_\u0100-\uffff][a-zA-Z_0-9\u0100-\uffff]*)\s*"
+    r"\((?P<params>[^()]*)\)\s*\{"
+)
+
+
+def _closing_brace(text: str, start: int) -> int:
+    """Finds the brace that closes a block opened before `start`, -1 if there's none"""
+    depth = 1
+    in_string = False
+    in_comment = False
+    previous = ""
+    for index in range(start, len(text)):
+        char = text[index]
+        if in_comment:
+            if char == "\n":
+                in_comment = False
+        elif in_string:
+            if char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == "/" and previous == "/":
+            in_comment = True
+        elif char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                return index
+        previous = char
+    return -1
+
+
+def func_signature(chunk: str) -> Optional[tuple]:
+    """Reads the signature of a chunk that is a single function definition
+
+    Only the header is read, the body is left as source.
+
+    Args:
+            chunk (str): A chunk from `iter_chunks()`
+
+    Returns:
+            Optional[tuple]: The name and the parameters, None if the chunk is something else
+    """
+    header = FUNC_HEADER.match(chunk)
+    if header is None:
+        return None
+    end = _closing_brace(chunk, header.end())
+    if end == -1:
+        return None
+    # Anything after the body means the chunk has more statements
+    rest = chunk[end + 1 :].strip()
+    if rest and not rest.startswith("//"):
+        return None
+    params = [param.strip() for param in header["params"].split(",") if param.strip()]
+    return header["name"], params
@@ -0,0 +1,177 @@
+from array import array
+
+from mathlamp.stdlamp.arrays import LampArray
+
+
+class StructInstance:
+    """Base class of struct instances
+
+    Every struct declaration creates a subclass with one `__slots__` entry per member,
+    so instances don't carry a dict and members are read and written in constant time.
+    Unassigned members are left empty.
+    """
+
+    __slots__ = ()
+    __struct__: "StructType"
+
+    # Helpers are module functions, so members can have any name (Ex. `values`)
+
+    def __repr__(self) -> str:
+        values = ", ".join(f"{key}={val!r}" for key, val in struct_values(self).items())
+        return f"{self.__struct__.name}({values})"
+
+    def __reduce__(self):
+        # The instance class is created at runtime, so pickle the struct instead
+        return _restore_instance, (self.__struct__, struct_values(self))
+
+
+def struct_values(instance: StructInstance) -> dict:
+    """Returns the assigned members of a struct instance and their values"""
+    values = {}
+    for member in instance.__struct__.members:
+        try:
+            values[member] = getattr(instance, member)
+        except AttributeError:
+            pass
+    return values
+
+
+def _restore_instance(struct: "StructType", values: dict) -> StructInstance:
+    instance = struct.new()
+    for member, value in values.items():
+        setattr(instance, member, value)
+    return instance
+
+
+class StructType:
+    __slots__ = ("name", "members", "namespace", "offsets", "instance")
+
+    def __init__(self, name: str, members: list, namespace: str):
+        """A struct declaration
+
+        Ex. `struct Point {x, y}`
+
+        Args:
+                name (str): The struct's name
+                members (list): The names of the members
+                namespace (str): The file that declared the struct
+        """
+        self.name = name
+        self.members = tuple(members)
+        self.namespace = namespace
+        self.offsets = {member: i for i, member in enumerate(self.members)}
+        self.instance = type(
+            name, (StructInstance,), {"__slots__": self.members, "__struct__": self}
+        )
+
+    @property
+    def full_name(self) -> str:
+        return f"{self.namespace}:{self.name}"
+
+    def new(self) -> StructInstance:
+        """Creates an instance with every member unassigned"""
+        return self.instance()
+
+    def __reduce__(self):
+        return StructType, (self.name, list(self.members), self.namespace)
+
+    def __repr__(self) -> str:
+        return f"StructType(name={self.name!r}, members={list(self.members)!r}, namespace={self.namespace!r})"
+
+
+class StructColumns:
+    __slots__ = ("struct", "columns")
+
+    def __init__(self, struct: StructType, columns: dict = None):
+        """A columnar collection of struct records
+
+        Stores each member as a packed numeric column instead of one instance per record,
+        so members can be combined with array arithmetic.
+
+        Ex. `points = columns(file:Point)`
+
+        Args:
+                struct (StructType): The struct of the records
+                columns (dict): The columns by member, empty columns if not provided
+        """
+        self.struct = struct
+        if columns is None:
+            columns = {member: LampArray(array("d")) for member in struct.members}
+        self.columns = columns
+
+    def column(self, member: str) -> LampArray:
+        """Returns the column of a member"""
+        return self.columns[member]
+
+    def set_column(self, member: str, values):
+        """Replaces the column of a member
+
+        Args:
+                member (str): The member
+                values: An array or a list with one value per record
+        """
+        if not isinstance(values, LampArray):
+            values = LampArray.from_values(values)
+        if len(values) != len(self):
+            raise ValueError(f"Column has {len(values)} values, expected {len(self)}")
+        self.columns[member] = values
+
+    def extend(self, columns: dict):
+        """Appends records, given as one sequence of values per member
+
+        Args:
+                columns (dict): The new values by member
+        """
+        if set(columns) != set(self.struct.members):
+            raise ValueError(
+                f"Expected values for {list(self.struct.members)}, got {list(columns)}"
+            )
+        sizes = {len(values) for values in columns.values()}
+        if len(sizes) > 1:
+            raise ValueError("Every member needs the same number of values")
+        new = {}
+        for member, values in columns.items():
+            column = self.columns[member].data
+            typecode = column.typecode if isinstance(column, array) else "d"
+            new[member] = array(typecode, values)
+        # Every column is converted before any of them grows,
+        # so invalid values leave the collection unchanged
+        for member, values in new.items():
+            column = self.columns[member].data
+            if not isinstance(column, array):
+                # Views (Ex. results of array arithmetic) can't grow, copy them once
+                column = array("d", column)
+                self.columns[member] = LampArray(column)
+            column.extend(values)
+
+    def filter(self, mask: LampArray) -> "StructColumns":
+        """Keeps the records where `mask` is true
+
+        Args:
+                mask (LampArray): A mask with one value per record
+
+        Returns:
+                StructColumns: The kept records
+        """
+        return StructColumns(
+            self.struct,
+            {member: column.filter(mask) for member, column in self.columns.items()},
+        )
+
+    def tolist(self) -> list:
+        return [struct_values(instance) for instance in self]
+
+    def __len__(self) -> int:
+        return len(next(iter(self.columns.values())))
+
+    def __iter__(self):
+        # Records are only materialized when iterated
+        for values in zip(*(self.columns[member] for member in self.struct.members)):
+            instance = self.struct.new()
+            for member, value in zip(self.struct.members, values):
+                setattr(instance, member, value)
+            yield instance
+
+    def __repr__(self) -> str:
+        columns = ", ".join(f"{key}={val!r}" for key, val in self.columns.items())
+        return f"{self.struct.name}[{len(self)}]({columns})"
@@ -0,0 +1,37 @@
+import pytest
+
+from mathlamp.stdlamp import arrays
+from mathlamp.stdlamp.arrays import LampArray
+
+
+@pytest.fixture(params=["numpy", "python"])
+def backend(request, monkeypatch):
+    # Arrays behave the same with and without NumPy
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(arrays, "numpy", None)
+    return request.param
+
+
+def test_array_arithmetic(backend):
+    a = LampArray.from_values([4, -1], "q")
+    assert (a * 2 + 1).tolist() == [9, -1]
+    assert (a / 2).tolist() == [2.0, -0.5]
+    assert (a > 0).tolist() == [1, 0]
+
+
+def test_array_errors(backend):
+    ints = LampArray.from_values([4, -1], "q")
+    floats = LampArray.from_values([1.5, 0.0])
+    with pytest.raises(ZeroDivisionError):
+        ints / LampArray.from_values([1, 0], "q")
+    with pytest.raises(ZeroDivisionError):
+        1 / floats
+    with pytest.raises(ZeroDivisionError):
+        ints % 0
+    # Ints don't wrap around
+    with pytest.raises(OverflowError):
+        ints**40
+    with pytest.raises(OverflowError):
+        ints * 2**62
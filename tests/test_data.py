@@ -0,0 +1,68 @@
+from typer.testing import CliRunner
+from mathlamp.main import app
+from mathlamp.stdlamp.errors import ArgumentError, InvalidData
+
+from array import array
+
+runner = CliRunner()
+
+
+def test_load_csv(tmp_path):
+    (tmp_path / "data.csv").write_text("a,b\n1,2\n3,4.5\n")
+    source = tmp_path / "csv.lmp"
+    source.write_text(f'out(load("{tmp_path / "data.csv"}", "b"))\n')
+    result = runner.invoke(app, [str(source)])
+    assert result.exit_code == 0
+    assert result.stdout.strip() == "[2.0, 4.5]"
+
+
+def test_save_load_npy(tmp_path):
+    target = tmp_path / "data.npy"
+    source = tmp_path / "npy.lmp"
+    source.write_text(f'save("{target}", [1, 2.5, 3])\nout(load("{target}"))\n')
+    result = runner.invoke(app, [str(source)])
+    assert result.exit_code == 0
+    assert result.stdout.strip() == "[1.0, 2.5, 3.0]"
+
+
+def test_load_binary(tmp_path):
+    target = tmp_path / "data.bin"
+    with target.open("wb") as f:
+        array("i", [4, 5, 6]).tofile(f)
+    source = tmp_path / "bin.lmp"
+    source.write_text(f'for (x in load("{target}", "i4")) {{out(x)}}\n')
+    result = runner.invoke(app, [str(source)])
+    assert result.exit_code == 0
+    assert result.stdout.splitlines() == ["4", "5", "6"]
+
+
+def test_load_save_errors(tmp_path):
+    (tmp_path / "data.csv").write_text("a,b\n1,2\n3,4.5\n")
+    header = b"{'descr': '<f8', 'fortran_order': True, 'shape': (2, 3), }\n"
+    (tmp_path / "fortran.npy").write_bytes(
+        b"\x93NUMPY\x01\x00" + len(header).to_bytes(2, "little") + header + bytes(48)
+    )
+    source = tmp_path / "csv_errors.lmp"
+    source.write_text(f'out(load("{tmp_path / "data.csv"}"))\n')
+    result = runner.invoke(app, [str(source)])
+    assert result.stdout.strip() == "[1.0, 3.0]"
+    for code in (
+        f'load("{tmp_path / "data.csv"}", 5)\n',
+        f'save("{tmp_path / "o.npy"}", ["a"])\n',
+        f'load("{tmp_path / "data.csv"}", 0, 1)\n',
+        "load(4)\n",
+        f'load("{tmp_path / "fortran.npy"}")\n',
+    ):
+        source.write_text(code)
+        result = runner.invoke(app, [str(source)])
+        assert result.exit_code == 1
+        assert isinstance(result.exception, (InvalidData, ArgumentError))
+
+
+def test_load_save_names(tmp_path):
+    # The built-ins don't reserve their names
+    source = tmp_path / "names.lmp"
+    source.write_text("func load(x) { x * 2 }\nsave = 3\nout(load(4) + save)\n")
+    result = runner.invoke(app, [str(source)])
+    assert result.exit_code == 0
+    assert result.stdout.strip() == "11"
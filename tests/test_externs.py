@@ -0,0 +1,115 @@
+import pytest
+from typer.testing import CliRunner
+from mathlamp.main import CalculateTree, DebugConfig, app, lamp_parser
+from mathlamp.stdlamp.arrays import LampArray
+
+runner = CliRunner()
+
+EXTERN = """
+import asyncio
+import time
+
+
+class LampExtern:
+    async def fetch(self, x):
+        await asyncio.sleep(0.01)
+        return x * 2
+
+    def block(self, x):
+        time.sleep(0.01)
+        return x + 1
+"""
+
+
+def test_async_extern(tmp_path):
+    (tmp_path / "async_extern.py").write_text(EXTERN)
+    source = tmp_path / "async.lmp"
+    source.write_text(
+        f'@extern("python", "{tmp_path / "async_extern.py"}", "fetch")\n'
+        "out(fetch(2))\n"
+    )
+    result = runner.invoke(app, [str(source)])
+    assert result.exit_code == 0
+    assert result.stdout.strip() == "4"
+
+
+def test_gather(tmp_path):
+    (tmp_path / "gather_extern.py").write_text(EXTERN)
+    source = tmp_path / "gather.lmp"
+    source.write_text(
+        f'@extern("python", "{tmp_path / "gather_extern.py"}", "fetch")\n'
+        f'@extern("python", "{tmp_path / "gather_extern.py"}", "block", "thread")\n'
+        "out(gather(fetch(1), block(2), 3))\n"
+    )
+    result = runner.invoke(app, [str(source)])
+    assert result.exit_code == 0
+    assert result.stdout.strip() == "[2, 3, 3]"
+
+
+def test_gather_name(tmp_path):
+    # gather() doesn't reserve its name
+    source = tmp_path / "gather_name.lmp"
+    source.write_text("func gather(x) { x * 3 }\nout(gather(2))\n")
+    result = runner.invoke(app, [str(source)])
+    assert result.exit_code == 0
+    assert result.stdout.strip() == "6"
+
+
+BUFFER_EXTERN = """
+from array import array
+
+
+class LampExtern:
+    def double(self, x):
+        assert isinstance(x, memoryview)
+        return array("d", [value * 2 for value in x])
+
+    def every_other(self, x):
+        return x[::2]
+
+    def transpose(self, x):
+        import numpy
+
+        return numpy.arange(6.0).reshape(2, 3).T
+"""
+
+
+def test_buffer_extern(tmp_path):
+    (tmp_path / "buffer_extern.py").write_text(BUFFER_EXTERN)
+    source = tmp_path / "buffer.lmp"
+    source.write_text(
+        f'@extern("python", "{tmp_path / "buffer_extern.py"}", "double", "buffer")\n'
+        f'save("{tmp_path / "data.npy"}", [1, 2, 3])\n'
+        f'out(double(load("{tmp_path / "data.npy"}")))\n'
+    )
+    result = runner.invoke(app, [str(source)])
+    assert result.exit_code == 0
+    assert result.stdout.strip() == "[2.0, 4.0, 6.0]"
+
+
+def test_strided_buffer_result(tmp_path):
+    (tmp_path / "buffer_extern.py").write_text(BUFFER_EXTERN)
+    calc = CalculateTree(DebugConfig(), "strided")
+    calc.vars["a"] = LampArray.from_values([1, 2, 3])
+    calc.visit(
+        lamp_parser().parse(
+            f'@extern("python", "{tmp_path / "buffer_extern.py"}", "every_other", "buffer")\n'
+            "x = every_other(a)\n"
+        )
+    )
+    # Strided results are packed
+    assert memoryview(calc.vars["x"].data).c_contiguous
+    assert calc.vars["x"].tolist() == [1.0, 3.0]
+
+
+def test_transposed_buffer_result(tmp_path):
+    pytest.importorskip("numpy")
+    (tmp_path / "buffer_extern.py").write_text(BUFFER_EXTERN)
+    source = tmp_path / "transposed.lmp"
+    source.write_text(
+        f'@extern("python", "{tmp_path / "buffer_extern.py"}", "transpose", "buffer")\n'
+        "out(transpose(1))\n"
+    )
+    result = runner.invoke(app, [str(source)])
+    assert result.exit_code == 0
+    assert result.stdout.strip() == "[0.0, 3.0, 1.0, 4.0, 2.0, 5.0]"
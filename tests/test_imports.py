@@ -0,0 +1,95 @@
+import sys
+
+from typer.testing import CliRunner
+from mathlamp.main import app, tools
+from mathlamp.stdlamp.errors import InvalidBundle, MissingFile, lamp_error_hook
+
+runner = CliRunner()
+
+MODULE = "func square(x) { x * x }\nfunc broken() { 1 + }\n"
+
+
+def test_import(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "mathlib.lmp").write_text("func square(x) { x * x }\n")
+    (tmp_path / "main.lmp").write_text("import mathlib.lmp\nout(mathlib:square(3))\n")
+    result = runner.invoke(app, ["main.lmp"])
+    assert result.exit_code == 0
+    assert result.stdout.strip() == "9"
+
+
+def test_lazy_import(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    # The body of broken() is only parsed if it is called
+    (tmp_path / "mathlib.lmp").write_text(MODULE)
+    (tmp_path / "main.lmp").write_text("import mathlib.lmp\nout(mathlib:square(3))\n")
+    result = runner.invoke(app, ["main.lmp", "--lazy"])
+    assert result.exit_code == 0
+    assert result.stdout.strip() == "9"
+
+
+def test_lazy_unused_package(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "candlepkgs").mkdir()
+    (tmp_path / "candlepkgs" / "unused.lmp").write_text("out(1 +)\n")
+    (tmp_path / "main.lmp").write_text("import pkg:unused.lmp\nout(2)\n")
+    result = runner.invoke(app, ["main.lmp", "--lazy"])
+    assert result.exit_code == 0
+    assert result.stdout.strip() == "2"
+
+
+def test_bundle(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "candlepkgs").mkdir()
+    (tmp_path / "candlepkgs" / "mathpkg.lmp").write_text("func square(x) { x * x }\n")
+    result = runner.invoke(tools, ["bundle", "mathpkg"])
+    assert result.exit_code == 0
+    assert (tmp_path / "candlepkgs" / "mathpkg.lampb").exists()
+    # Only the bundle is deployed
+    (tmp_path / "candlepkgs" / "mathpkg.lmp").unlink()
+    (tmp_path / "main.lmp").write_text(
+        "import pkg:mathpkg.lmp\nout(mathpkg:square(4))\n"
+    )
+    for args in (["main.lmp"], ["main.lmp", "--lazy"]):
+        result = runner.invoke(app, args)
+        assert result.exit_code == 0
+        assert result.stdout.strip() == "16"
+
+
+def test_corrupt_bundle(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "candlepkgs").mkdir()
+    (tmp_path / "candlepkgs" / "mathpkg.lmp").write_text("func square(x) { x * x }\n")
+    (tmp_path / "candlepkgs" / "mathpkg.lampb").write_bytes(b"")
+    (tmp_path / "main.lmp").write_text(
+        "import pkg:mathpkg.lmp\nout(mathpkg:square(4))\n"
+    )
+    # Falls back to the source
+    result = runner.invoke(app, ["main.lmp"])
+    assert result.exit_code == 0
+    assert result.stdout.strip() == "16"
+    (tmp_path / "candlepkgs" / "mathpkg.lmp").unlink()
+    result = runner.invoke(app, ["main.lmp"])
+    assert isinstance(result.exception, InvalidBundle)
+
+
+def test_bundle_missing_package(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    result = runner.invoke(tools, ["bundle", "nosuch"])
+    assert isinstance(result.exception, MissingFile)
+    assert sys.excepthook is lamp_error_hook
+
+
+def test_bundle_duplicate_function(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "candlepkgs").mkdir()
+    (tmp_path / "candlepkgs" / "dup.lmp").write_text(
+        "func f(x) { x }\nfunc f(x) { x * 2 }\n"
+    )
+    (tmp_path / "main.lmp").write_text("import pkg:dup.lmp\nout(dup:f(3))\n")
+    assert runner.invoke(app, ["main.lmp"]).stdout.strip() == "3"
+    runner.invoke(tools, ["bundle", "dup"])
+    (tmp_path / "candlepkgs" / "dup.lmp").unlink()
+    result = runner.invoke(app, ["main.lmp"])
+    assert result.exit_code == 0
+    assert result.stdout.strip() == "3"
@@ -0,0 +1,67 @@
+import sys
+from io import StringIO
+
+from typer.testing import CliRunner
+
+from mathlamp.main import CalculateTree, DebugConfig, app, lamp_parser, tools
+from mathlamp.stdlamp.errors import MissingFile, lamp_error_hook
+from mathlamp.stdlamp.incremental import IncrementalSession
+from mathlamp.stdlamp.infer import specialize
+from mathlamp.stdlamp.output import TextOutput
+
+SOURCE = "x = 2\ny = 10\nfunc f(a) { a * x }\nout(f(3))\nout(y)\n"
+
+
+def test_incremental():
+    stream = StringIO()
+    calc = CalculateTree(DebugConfig(), "watched", TextOutput(stream, buffer_size=0))
+    session = IncrementalSession(calc, lamp_parser(), specialize)
+    assert len(session.run(SOURCE)) == 5
+    assert len(session.run(SOURCE)) == 0
+    # Changing x re-runs the function and the call, not y
+    assert len(session.run(SOURCE.replace("x = 2", "x = 5"))) == 3
+    assert stream.getvalue().splitlines() == ["6", "10", "15"]
+
+
+def test_incremental_reorder():
+    stream = StringIO()
+    calc = CalculateTree(DebugConfig(), "watched", TextOutput(stream, buffer_size=0))
+    session = IncrementalSession(calc, lamp_parser(), specialize)
+    session.run("x = 1\nx = 2\nout(x)\n")
+    # Swapping the writers of x changes its value
+    session.run("x = 2\nx = 1\nout(x)\n")
+    assert calc.vars["x"] == 1
+    session.run("x = 2\nx = 1\nx = x + 1\nout(x)\n")
+    assert stream.getvalue().splitlines() == ["2", "1", "2"]
+
+
+def test_reload(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "model.lmp").write_text(
+        "struct Point {x, y}\np = model:Point\np.x = 3\nout(p.x)\n"
+    )
+    result = CliRunner().invoke(
+        app, input=":reload model.lmp\nout(p)\nq = model:Point\n:reload\n"
+    )
+    assert result.exit_code == 0
+    assert "> 3\n> Point(x=3)\n> > " in result.stdout
+
+
+def test_watch_missing_file(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    result = CliRunner().invoke(tools, ["watch", "nosuch.lmp"])
+    assert isinstance(result.exception, MissingFile)
+    assert sys.excepthook is lamp_error_hook
+
+
+def test_watch_runtime_error(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "broken.lmp").write_text("out(1)\nout(1 / 0)\n")
+
+    def stop(interval):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr("time.sleep", stop)
+    result = CliRunner().invoke(tools, ["watch", "broken.lmp"])
+    assert result.exit_code == 0
+    assert "ZeroDivisionError" in result.stdout
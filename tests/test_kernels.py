@@ -0,0 +1,59 @@
+import pytest
+
+from mathlamp.main import CalculateTree, DebugConfig, lamp_parser
+from mathlamp.stdlamp import arrays, kernels
+from mathlamp.stdlamp.arrays import LampArray
+from mathlamp.stdlamp.infer import specialize
+from mathlamp.stdlamp.kernels import lift
+
+FUNCS = (
+    "func f(x) { pow(x, 2) * 3 + sqrt(x) }\n"
+    "func g(x, y) { math:comb(x, y) + x % 3 }\n"
+    "func h(x) { out(x) }\n"
+)
+
+
+def run(calc, code):
+    return calc.visit(specialize(lamp_parser().parse(code)))
+
+
+def test_kernels():
+    calc = CalculateTree(DebugConfig(), "kernels")
+    run(calc, FUNCS)
+    calc.vars["a"] = LampArray.from_values([1, 4, 9], "q")
+    assert run(calc, "f(a)").tolist() == [4, 50, 246]
+    # comb has no NumPy ufunc, the Python kernel is used
+    assert run(calc, "g(a, 2)").tolist() == [1, 7, 36]
+    # Not liftable, the array is passed as it is
+    assert calc.kernels and lift(["x"], calc.funcs[2]["block"]) is None
+
+
+def test_kernel_python():
+    calc = CalculateTree(DebugConfig(), "kernels")
+    run(calc, FUNCS)
+    kernel = lift(["x"], calc.funcs[0]["block"], use_numpy=False)
+    assert kernel.numpy is None
+    assert kernel([LampArray.from_values([1, 4], "q")]).tolist() == [4, 50]
+
+
+@pytest.fixture(params=["numpy", "python"])
+def backend(request, monkeypatch):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(arrays, "numpy", None)
+        monkeypatch.setattr(kernels, "numpy", None)
+    return request.param
+
+
+def test_kernel_errors(backend):
+    # Kernels give the results and errors of single values, with or without NumPy
+    calc = CalculateTree(DebugConfig(), "kernels")
+    run(calc, "func h(x) { pow(x, 40) }\nfunc r(x) { sqrt(x) }\nfunc d(x) { 10 / x }\n")
+    calc.vars["a"] = LampArray.from_values([4, -1], "q")
+    calc.vars["b"] = LampArray.from_values([1, 0], "q")
+    assert run(calc, "h(a)").tolist() == [4**40, 1]
+    with pytest.raises(ValueError):
+        run(calc, "r(a)")
+    with pytest.raises(ZeroDivisionError):
+        run(calc, "d(b)")
@@ -0,0 +1,28 @@
+from typer.testing import CliRunner
+from mathlamp.main import app
+
+runner = CliRunner(mix_stderr=False)
+
+
+def test_mem_report(tmp_path):
+    source = tmp_path / "memory.lmp"
+    source.write_text(
+        "a = [1, 2, 3]\n"
+        "b = a + [4, 5, 6, 7, 8, 9, 10, 11, 12]\n"
+        '@debug("mem")\n'
+        "out(b)\n"
+    )
+    result = runner.invoke(app, [str(source), "--mem-report"])
+    assert result.exit_code == 0
+    assert result.stdout.startswith("debug-mem>> traced")
+    assert "memory.lmp:2:" in result.stderr
+    assert "  b: " in result.stderr
+
+
+def test_debug_mem(tmp_path):
+    source = tmp_path / "debug_mem.lmp"
+    source.write_text('a = [1, 2, 3]\n@debug("mem")\n')
+    result = runner.invoke(app, [str(source)])
+    assert result.stdout == ""
+    result = runner.invoke(app, [str(source), "--debug-mem"])
+    assert result.stdout.startswith("debug-mem>> {a=")
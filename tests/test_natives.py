@@ -0,0 +1,90 @@
+from typer.testing import CliRunner
+from mathlamp.main import app
+
+runner = CliRunner()
+
+
+def test_math_namespace(tmp_path):
+    source = tmp_path / "natives.lmp"
+    source.write_text(
+        "out(pow(3, 200, 7))\n"
+        "out(math:gcd(12, 18))\n"
+        "out(math:comb(50, 25))\n"
+        "out(math:isqrt(99))\n"
+        "out(math:fsum([0.1, 0.2, 0.7]))\n"
+        "out(math:isprime(1000000007))\n"
+        "out(math:isprime(561))\n"
+        # Strong pseudoprime to every Miller-Rabin base
+        "out(math:isprime(3317044064679887385961981))\n"
+        "out(math:isprime(618970019642690137449562111))\n"
+    )
+    result = runner.invoke(app, [str(source)])
+    assert result.exit_code == 0
+    assert result.stdout.splitlines() == [
+        "2",
+        "6",
+        "126410606437752",
+        "9",
+        "1",
+        "True",
+        "False",
+        "False",
+        "True",
+    ]
+
+
+def test_native_error(tmp_path):
+    source = tmp_path / "native_error.lmp"
+    source.write_text("out(math:factorial(0 - 1))\n")
+    result = runner.invoke(app, [str(source)])
+    assert result.exit_code == 1
+    assert "math:factorial" in result.exception.msg
+
+
+def test_reductions(tmp_path):
+    source = tmp_path / "reductions.lmp"
+    source.write_text(
+        "out(sum([0.1, 0.2, 0.3]))\n"
+        'out(min({"a": 3, "b": 1}))\n'
+        "out(mean([1, 2, 3, 4]))\n"
+        "out(dot([1, 2, 3], [4, 5, 6]))\n"
+        "out(cumsum([1, 2, 3]))\n"
+        "out(sort([3, 1, 2]))\n"
+        "out(argmax([3, 7, 2]))\n"
+        "out(math:max([4, 9, 2]))\n"
+    )
+    result = runner.invoke(app, [str(source)])
+    assert result.exit_code == 0
+    assert result.stdout.splitlines() == [
+        "0.6",
+        "1",
+        "2.5",
+        "32",
+        "[1, 3, 6]",
+        "[1, 2, 3]",
+        "1",
+        "9",
+    ]
+
+
+def test_reductions_columns(tmp_path):
+    source = tmp_path / "reductions_columns.lmp"
+    source.write_text(
+        "struct Point {x, y}\n"
+        "points = columns(reductions_columns:Point)\n"
+        "append(points, [1, 3], [2, 5])\n"
+        "out(sum(points.y))\n"
+        "out(dot(points.x, points.y))\n"
+        "out(sort(points.y * 0 - points.y))\n"
+    )
+    result = runner.invoke(app, [str(source)])
+    assert result.exit_code == 0
+    assert result.stdout.splitlines() == ["7", "17", "[-5.0, -2.0]"]
+
+
+def test_user_functions_shadow_builtins(tmp_path):
+    source = tmp_path / "shadow.lmp"
+    source.write_text("func max(a, b) { a }\nout(max(1, 2))\n")
+    result = runner.invoke(app, [str(source)])
+    assert result.exit_code == 0
+    assert result.stdout.splitlines() == ["1"]
@@ -0,0 +1,25 @@
+from typer.testing import CliRunner
+from mathlamp.main import app
+
+import json
+
+runner = CliRunner()
+
+
+def test_output_file(tmp_path):
+    source = tmp_path / "output.lmp"
+    source.write_text('out(1 + 1)\nout("hello")\n')
+    target = tmp_path / "output.txt"
+    result = runner.invoke(app, [str(source), "--output", str(target)])
+    assert result.exit_code == 0
+    assert result.stdout == ""
+    assert target.read_text().splitlines() == ["2", "hello"]
+
+
+def test_output_jsonl(tmp_path):
+    source = tmp_path / "jsonl.lmp"
+    source.write_text('out([1, 2])\nout("hello")\nrepeat (2) {3}\n')
+    result = runner.invoke(app, [str(source), "--output-format", "jsonl"])
+    assert result.exit_code == 0
+    lines = [json.loads(line) for line in result.stdout.splitlines()]
+    assert lines == [[1, 2], "hello", 3, 3]
@@ -0,0 +1,63 @@
+import pytest
+from typer.testing import CliRunner
+
+from mathlamp.main import CalculateTree, DebugConfig, app
+from mathlamp.stdlamp.arrays import LampArray
+from mathlamp.stdlamp.errors import InvalidSnapshot
+from mathlamp.stdlamp.snapshot import write_snapshot
+
+runner = CliRunner()
+
+
+def test_snapshot(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    result = runner.invoke(
+        app,
+        input="struct Point {x, y}\n"
+        "p = REPL:Point\n"
+        "p.x = 3\n"
+        "func f(a) { a * 10 }\n"
+        ":save session.lamps\n",
+    )
+    assert result.exit_code == 0
+    result = runner.invoke(
+        app, ["--restore", "session.lamps"], input="out(f(p.x))\nout(p)\n"
+    )
+    assert result.exit_code == 0
+    assert "> 30\n> Point(x=3)" in result.stdout
+
+
+def test_snapshot_arrays(tmp_path):
+    calc = CalculateTree(DebugConfig())
+    calc.vars["a"] = LampArray.from_values([1, 2, 3], "q")
+    calc.vars["b"] = calc.vars["a"]
+    calc.save_snapshot(tmp_path / "arrays.lamps")
+    restored = CalculateTree(DebugConfig())
+    restored.restore_snapshot(tmp_path / "arrays.lamps")
+    assert isinstance(restored.vars["a"].data, memoryview)
+    assert restored.vars["a"].tolist() == [1, 2, 3]
+    assert restored.vars["a"] is restored.vars["b"]
+
+
+def test_snapshot_strided_array(tmp_path):
+    calc = CalculateTree(DebugConfig())
+    calc.vars["a"] = LampArray.from_values([1, 2, 3], "q")[::2]
+    calc.save_snapshot(tmp_path / "strided.lamps")
+    restored = CalculateTree(DebugConfig())
+    restored.restore_snapshot(tmp_path / "strided.lamps")
+    assert restored.vars["a"].tolist() == [1, 3]
+
+
+def test_snapshot_version(tmp_path):
+    write_snapshot({}, tmp_path / "old.lamps", {"interpreter": "0.0.1"})
+    with pytest.raises(InvalidSnapshot):
+        CalculateTree(DebugConfig()).restore_snapshot(tmp_path / "old.lamps")
+
+
+def test_restore_types(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    runner.invoke(app, input="x = 2.25\n:save session.lamps\n")
+    (tmp_path / "restored.lmp").write_text("out(sqrt(x))\nx = 4\n")
+    result = runner.invoke(app, ["restored.lmp", "--restore", "session.lamps"])
+    assert result.exit_code == 0
+    assert result.stdout == "1.5\n"
@@ -0,0 +1,52 @@
+from typer.testing import CliRunner
+from mathlamp.main import app
+
+runner = CliRunner()
+
+
+def test_stream(tmp_path):
+    source = tmp_path / "stream.lmp"
+    source.write_text(
+        "// comment\n"
+        "x = 1 +\n"
+        "  2\n"
+        "out(x) out(x * 2)\n"
+        "func f(a) {\n"
+        '  out(a + "}")\n'
+        "}\n"
+        'f("q")\n'
+    )
+    result = runner.invoke(app, [str(source), "--stream"])
+    assert result.exit_code == 0
+    assert result.stdout.splitlines() == ["3", "6", "q}"]
+
+
+def test_stream_syntax_error(tmp_path):
+    source = tmp_path / "stream_error.lmp"
+    source.write_text("out(1)\nout(2)\nout(1 +)\n")
+    result = runner.invoke(app, [str(source), "--stream"])
+    assert result.exit_code == 1
+    assert result.exception.line == 3
+
+
+def run_both(tmp_path, name, code):
+    source = tmp_path / name
+    source.write_text(code)
+    normal = runner.invoke(app, [str(source)])
+    streamed = runner.invoke(app, [str(source), "--stream"])
+    assert streamed.exit_code == normal.exit_code
+    assert streamed.stdout == normal.stdout
+    return streamed
+
+
+def test_stream_continued_statement(tmp_path):
+    result = run_both(
+        tmp_path, "continued.lmp", "x = 1\n  + 2\n\n// c\n  * 3\nout(x)\n"
+    )
+    assert result.stdout == "7\n"
+
+
+def test_stream_same_cut(tmp_path):
+    run_both(tmp_path, "cut.lmp", "x = 5\nout(x)\n-1\n")
+    result = run_both(tmp_path, "cut_value.lmp", "x = 5\ny = x\n-1\nout(y)\n")
+    assert result.stdout == "4\n"
@@ -0,0 +1,90 @@
+import pytest
+from typer.testing import CliRunner
+from mathlamp.main import CalculateTree, DebugConfig, app, lamp_parser
+from mathlamp.stdlamp.errors import InvalidData
+
+runner = CliRunner()
+
+
+def test_struct_members(tmp_path):
+    source = tmp_path / "point.lmp"
+    source.write_text(
+        "struct Point {x, y}\np = point:Point\np.x = 3\np.y = p.x * 2\nout(p.y)\nout(p)\n"
+    )
+    result = runner.invoke(app, [str(source)])
+    assert result.exit_code == 0
+    assert result.stdout.splitlines() == ["6", "Point(x=3, y=6)"]
+
+
+def test_struct_member_names(tmp_path):
+    source = tmp_path / "stats.lmp"
+    source.write_text(
+        "struct Stats {values, count}\ns = stats:Stats\ns.values = 1\nout(s)\n"
+    )
+    result = runner.invoke(app, [str(source)])
+    assert result.exit_code == 0
+    assert result.stdout.splitlines() == ["Stats(values=1)"]
+
+
+def test_struct_invalid_member(tmp_path):
+    source = tmp_path / "point.lmp"
+    source.write_text("struct Point {x, y}\np = point:Point\np.z = 1\n")
+    result = runner.invoke(app, [str(source)])
+    assert result.exit_code == 1
+
+
+def test_struct_columns(tmp_path):
+    source = tmp_path / "records.lmp"
+    source.write_text(
+        "struct Point {x, y}\n"
+        "points = columns(records:Point)\n"
+        "append(points, [1, 2, 3], [10, 20, 30])\n"
+        "out(points.x * 2 + points.y)\n"
+        "big = filter(points, points.y > 15)\n"
+        "out(big.x)\n"
+    )
+    result = runner.invoke(app, [str(source)])
+    assert result.exit_code == 0
+    assert result.stdout.splitlines() == ["[12.0, 24.0, 36.0]", "[2.0, 3.0]"]
+
+
+def test_struct_columns_errors(tmp_path):
+    source = tmp_path / "records.lmp"
+    header = "struct Point {x, y}\npoints = columns(records:Point)\n"
+    for code in (
+        "p = records:Point\np.x = 1\nappend(points, p)\n",
+        "big = filter(points, true)\n",
+        "big = filter([1, 2], 1 > 0)\n",
+        "append([1], 2)\n",
+    ):
+        source.write_text(header + code)
+        result = runner.invoke(app, [str(source)])
+        assert result.exit_code == 1
+        assert isinstance(result.exception, InvalidData)
+
+
+def test_struct_columns_names(tmp_path):
+    # The built-ins don't reserve their names
+    source = tmp_path / "names.lmp"
+    source.write_text(
+        "filter = 3\nfunc append(x) { x + 1 }\ncolumns = append(filter)\nout(columns)\n"
+    )
+    result = runner.invoke(app, [str(source)])
+    assert result.exit_code == 0
+    assert result.stdout.strip() == "4"
+
+
+def test_struct_columns_append_atomic(tmp_path):
+    calc = CalculateTree(DebugConfig(), "records")
+    calc.visit(
+        lamp_parser().parse(
+            "struct Point {x, y}\n"
+            "points = columns(records:Point)\n"
+            "append(points, [1, 2], [10, 20])\n"
+        )
+    )
+    bad = lamp_parser().parse('append(points, [5], ["a"])\n')
+    with pytest.raises(InvalidData):
+        calc.visit(bad)
+    points = calc.vars["points"]
+    assert [len(column) for column in points.columns.values()] == [2, 2]
@@ -32,3 +32,15 @@ def test_dict():
     result = runner.invoke(app, ["-r", '{"foo":"baz","test":1}'])
     assert result.exit_code == 0
     assert result.stdout.strip() == "{'foo': 'baz', 'test': 1}"
+
+
+def test_int_division():
+    result = runner.invoke(app, ["-r", "30000000000000000000003 / 3"])
+    assert result.exit_code == 0
+    assert result.stdout.strip() == "10000000000000000000001"
+
+
+def test_int_sqrt():
+    result = runner.invoke(app, ["-r", "sqrt(100000000000000000000000000000000000000)"])
+    assert result.exit_code == 0
+    assert result.stdout.strip() == "10000000000000000000"